@@ -15,20 +15,34 @@ Usage in Claude Code:
 import json
 import sys
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# Add scripts directory to path
+# Make the skill scripts importable
+# Decision: Append rather than prepend
+# - Plugin directories are hyphenated, so scripts/ can't be imported as a dotted package
+# - Appending keeps stdlib/site-packages lookups from scanning scripts/ first
 SCRIPT_DIR = Path(__file__).parent / "skills" / "smart-cli-wrapper" / "scripts"
-sys.path.insert(0, str(SCRIPT_DIR))
+if str(SCRIPT_DIR) not in sys.path:
+    sys.path.append(str(SCRIPT_DIR))
 
 from cli_interceptor import CLIInterceptor
 
+# tools/call requests executing at once; also the number of command-execution threads
+MAX_CONCURRENT_CALLS = 4
+
 
 class SmartCLIMCPServer:
     """MCP Server for Smart CLI Wrapper."""
 
     def __init__(self):
         self.interceptor = CLIInterceptor()
+        # Shared pool for blocking work (command execution, token counting)
+        # so the event loop stays free while a command runs; one thread per
+        # request slot, shut down when run() exits
+        self._pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_CALLS)
+        self._slots = None  # asyncio.Semaphore, created on run()'s loop
 
     async def handle_request(self, request: dict) -> dict:
         """Handle MCP requests."""
@@ -38,7 +52,9 @@ class SmartCLIMCPServer:
             return self.list_tools()
 
         elif method == "tools/call":
-            return await self.call_tool(request.get("params", {}))
+            # Only command execution takes a slot; cheap methods never wait behind it
+            async with self._slots:
+                return await self.call_tool(request.get("params", {}))
 
         elif method == "initialize":
             return {
@@ -132,11 +148,13 @@ class SmartCLIMCPServer:
 
         try:
             # Execute with compression
-            result = self.interceptor.execute_with_compression(
+            # Command runs on the shared pool; the claude call is awaited natively
+            result = await self.interceptor.execute_with_compression_async(
                 command=command,
                 user_intent=intent,
                 compression_instructions=compress,
-                timeout=timeout
+                timeout=timeout,
+                executor=self._pool
             )
 
             if not result["success"]:
@@ -154,7 +172,12 @@ class SmartCLIMCPServer:
                 output = result.get("compressed") or result.get("raw", "")
 
                 # Build metadata message
-                metadata = f"Raw: {result['raw_tokens']} tokens"
+                # raw_tokens is None when output was too short to need a count
+                raw_tokens = result["raw_tokens"]
+                if raw_tokens is None:
+                    metadata = f"Raw: <= {self.interceptor.threshold} tokens"
+                else:
+                    metadata = f"Raw: {raw_tokens} tokens"
                 if result.get("compression_applied"):
                     metadata += (
                         f"\nCompressed: {result['compressed_tokens']} tokens"
@@ -163,10 +186,17 @@ class SmartCLIMCPServer:
                 else:
                     metadata += "\nNo compression (below threshold)"
 
+                # Decision: Emit metadata and output as separate text parts
+                # - Avoids copying the (potentially large) output into a joined string
+                # - MCP clients concatenate multiple text parts on render
                 content = [
                     {
                         "type": "text",
-                        "text": f"{metadata}\n\n{output}"
+                        "text": metadata
+                    },
+                    {
+                        "type": "text",
+                        "text": output
                     }
                 ]
 
@@ -183,38 +213,82 @@ class SmartCLIMCPServer:
                 }
             }
 
-    async def run(self):
-        """Run the MCP server."""
-        while True:
-            try:
-                # Read JSON-RPC request from stdin
-                line = sys.stdin.readline()
-                if not line:
-                    break
-
-                request = json.loads(line)
-                response = await self.handle_request(request)
-
-                # Write JSON-RPC response to stdout
-                print(json.dumps(response), flush=True)
+    def _write_response(self, out, response: dict) -> None:
+        """Write one JSON-RPC response frame as UTF-8 bytes and flush once."""
+        out.write(json.dumps(response).encode("utf-8") + b"\n")
+        out.flush()
 
-            except json.JSONDecodeError as e:
-                error_response = {
-                    "error": {
-                        "code": -32700,
-                        "message": f"Parse error: {str(e)}"
-                    }
+    async def _respond(self, line: str) -> dict:
+        """Parse and handle one request line, turning failures into error responses."""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return {
+                "error": {
+                    "code": -32700,
+                    "message": f"Parse error: {str(e)}"
                 }
-                print(json.dumps(error_response), flush=True)
+            }
 
-            except Exception as e:
-                error_response = {
-                    "error": {
-                        "code": -32603,
-                        "message": f"Internal error: {str(e)}"
-                    }
+        try:
+            return await self.handle_request(request)
+        except Exception as e:
+            return {
+                "error": {
+                    "code": -32603,
+                    "message": f"Internal error: {str(e)}"
                 }
-                print(json.dumps(error_response), flush=True)
+            }
+
+    def _read_stdin(self, loop: asyncio.AbstractEventLoop, lines: asyncio.Queue) -> None:
+        """Forward stdin lines to the event loop ("" marks EOF); runs on a daemon thread."""
+        for line in iter(sys.stdin.readline, ""):
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+        loop.call_soon_threadsafe(lines.put_nowait, "")
+
+    async def _write_in_order(self, responses: asyncio.Queue) -> None:
+        """Write each request's response as it completes, in request order."""
+        # Write bytes straight to the underlying buffer (skips the text codec layer)
+        out = sys.stdout.buffer
+        while True:
+            task = await responses.get()
+            if task is None:
+                return
+            self._write_response(out, await task)
+
+    async def run(self):
+        """
+        Run the MCP server.
+
+        Decision: Dispatch each request as its own task
+        - Requests execute concurrently: later commands and compressions start
+          without waiting for earlier ones to finish
+        - Responses carry no request id, so they are still written in request
+          order: a response (even to tools/list or initialize) is held until
+          every earlier request has been answered
+        - stdin is read on a daemon thread, so the event loop never blocks on it
+          (and a pending read can't hold up interpreter exit)
+        - At most MAX_CONCURRENT_CALLS tools/call requests run at once, matching
+          the thread pool; other methods don't take a slot
+        """
+        loop = asyncio.get_running_loop()
+        self._slots = asyncio.Semaphore(MAX_CONCURRENT_CALLS)
+        lines = asyncio.Queue()
+        responses = asyncio.Queue()
+        threading.Thread(target=self._read_stdin, args=(loop, lines), daemon=True).start()
+        writer = asyncio.create_task(self._write_in_order(responses))
+
+        try:
+            while True:
+                line = await lines.get()
+                if not line:
+                    break
+                responses.put_nowait(asyncio.create_task(self._respond(line)))
+
+            responses.put_nowait(None)
+            await writer
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
 
 
 async def main():
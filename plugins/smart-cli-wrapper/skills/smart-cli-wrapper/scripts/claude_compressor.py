@@ -12,9 +12,120 @@ Decision: Let Claude compress instead of hardcoded rules
 - Uses Claude Max subscription (no API costs)
 """
 
+import asyncio
+import re
 import subprocess
 import sys
 import json
+from collections import OrderedDict
+
+from token_counter import TIKTOKEN_AVAILABLE, _approximate_tokens, get_encoding, get_default_counter
+
+# Prompt is written to stdin rather than passed as an argument
+CLAUDE_ARGS = ["claude", "--print"]
+
+# Truncation budget for raw output embedded in the prompt
+# Decision: Budget well below the context window, not up to it
+# - Compression latency and cost scale with input tokens
+# - Head + tail of long (log-like) output carries nearly all of its signal
+# - Callers needing more of the middle can raise max_input_tokens
+MAX_INPUT_TOKENS = 8_000
+
+# Noise scrubbed from output before it reaches the model
+# Decision: Strip trivially regex-detectable noise locally
+# - UUIDs and request/trace IDs are removed by the prompt guidelines anyway
+# - Doing it up front saves model input tokens
+# - Timestamps are left alone: the model keeps them when actionable (e.g. on errors)
+# - Skipped when custom instructions are given (user may want IDs kept)
+SCRUB_PATTERNS = [
+    (re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"), "<uuid>"),
+    (re.compile(r"\b(request_id|trace_id|span_id|correlation_id)([=:]\s*)\S+", re.IGNORECASE), r"\1\2<id>"),
+]
+
+# Incremental compression of repeated commands (e.g. tailing logs)
+# Decision: Only send the changed suffix when most of the output was already summarized
+# - Shared prefix must cover > 50% of the new output to be worth it
+# - Keep the last few commands only (raw outputs can be MBs each)
+INCREMENTAL_MIN_PREFIX_RATIO = 0.5
+MAX_CACHED_COMMANDS = 8
+
+# Compression guidelines embedded in the prompt
+# Decision: Specialize guidelines for well-known CLI tools
+# - Generic rules (UUID removal, stack traces, ...) waste prompt tokens on tools that never emit them
+# - Shorter, focused guidelines = cheaper calls and lower first-token latency
+# - Unknown tools fall back to the generic guidelines
+DEFAULT_GUIDELINES = """1. **Preserve critical data**:
+   - Errors, warnings, status codes
+   - Resource states (running, pending, failed, etc.)
+   - Versions, counts, timestamps (if actionable)
+   - User-facing messages
+
+2. **Remove noise**:
+   - UUIDs, internal IDs, request/trace IDs
+   - Debug timestamps (unless part of error)
+   - Verbose metadata (created_by, updated_by, internal_* fields)
+   - Redundant object wrappers
+
+3. **Summarize collections**:
+   - If >7 items: Show 5 most recent/relevant + aggregate rest
+   - Example: "8 failed pods" instead of listing all 8
+   - Provide status breakdown (e.g., "185 running, 8 pending, 3 failed")
+
+4. **Extract error essence**:
+   - Root cause message
+   - Location in user's code (not framework internals)
+   - Actionable suggestion
+   - Skip verbose stack traces (keep top 2-3 frames max)
+
+5. **Maintain structure**:
+   - Keep JSON structure if it aids clarity
+   - Use markdown formatting for readability
+   - Group related information together
+
+6. **Be ruthless**:
+   - If data isn't actionable by the user, omit it
+   - Users can always see raw output if needed
+   - Your job is radical compression while preserving utility"""
+
+TOOL_GUIDELINES = {
+    "kubectl": """1. **Resource states**: Group by status (Running, Pending, CrashLoopBackOff, Error, ...) with counts
+2. **Problems first**: List every non-ready resource with namespace/name, restarts, and reason
+3. **Collapse replicas**: Strip pod hash suffixes and aggregate identical workloads
+4. **Logs/events**: Keep errors and warnings with their message; drop routine info lines""",
+    "terraform": """1. **Plan summary**: Keep the final "Plan: X to add, Y to change, Z to destroy" line
+2. **Resource diffs**: List each resource address with its action (create/update/replace/destroy)
+3. **Changed attributes only**: Show before → after for updated attributes; omit "(known after apply)"
+4. **Errors/warnings**: Keep the full message and the file:line it points to""",
+    "aws": """1. **Identify resources**: Keep IDs, names/tags, type/size, state, region/AZ, and public/private IPs
+2. **Drop metadata**: Omit ARNs, ownership IDs, timestamps, and empty/default-valued fields
+3. **Summarize collections**: Group by state with counts; show 5 most relevant items + aggregate rest
+4. **Errors**: Keep error code and message""",
+    "docker": """1. **Containers/images**: Keep name, image:tag, status, ports, and size; shorten IDs to 12 chars
+2. **Problems first**: Highlight exited/unhealthy containers with exit codes
+3. **Build/log output**: Keep failing step and error message; drop layer download progress""",
+    "git": """1. **Status/diff**: Keep file paths and change type; summarize large hunks by lines added/removed
+2. **Log**: Keep short SHA, author, date, and subject; drop full bodies unless they explain a fix
+3. **Errors/conflicts**: Keep the full message and conflicting paths""",
+}
+
+
+def _prescrub(text: str) -> str:
+    """Replace UUIDs and request/trace IDs with short placeholders."""
+    for pattern, replacement in SCRUB_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    """Length of the longest common prefix of a and b (binary search over C-level compares)."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
 
 
 class ClaudeCompressor:
@@ -24,16 +135,73 @@ class ClaudeCompressor:
     This is the core innovation: Claude Code using itself to optimize context.
     """
 
-    def __init__(self, model: str = "haiku", timeout: int = 30):
+    def __init__(self, model: str = "haiku", timeout: int = 30, max_input_tokens: int = MAX_INPUT_TOKENS):
         """
         Initialize compressor.
 
         Args:
         - model: "haiku" (fast, default) or "sonnet" (higher quality)
         - timeout: Max seconds to wait for compression (default: 30)
+        - max_input_tokens: Raw output beyond this is truncated to head + tail (default: 8000)
         """
         self.model = model
         self.timeout = timeout
+        self.max_input_tokens = max_input_tokens
+        # Loaded lazily on first prompt build (shared process-wide via token_counter)
+        self._enc = None
+        # (command, intent, instructions) -> (raw_output, compressed_output) of the last compression
+        self._prev = OrderedDict()
+
+    def _get_encoding(self):
+        """Return the cl100k_base encoding, or None if tiktoken is not installed."""
+        if self._enc is None and TIKTOKEN_AVAILABLE:
+            self._enc = get_encoding("cl100k_base")
+        return self._enc
+
+    def _prepare(
+        self,
+        key: tuple,
+        raw_output: str,
+        command: str,
+        user_intent: str,
+        compression_instructions: str
+    ) -> tuple:
+        """
+        Pick the cheapest way to compress raw_output given the previous result for key.
+
+        Returns (prompt, cached_output):
+        - Output unchanged since last call: (None, previous compressed output)
+        - Output mostly shares a prefix with last call: (incremental prompt, None)
+        - Otherwise: (full compression prompt, None)
+        """
+        prev = self._prev.get(key)
+        if prev is not None:
+            prev_raw, prev_compressed = prev
+            if prev_raw == raw_output:
+                return None, prev_compressed
+
+            prefix_len = _common_prefix_len(prev_raw, raw_output)
+            # Back up to a line start so the new tail keeps whole rows (0 if no newline)
+            prefix_len = raw_output.rfind("\n", 0, prefix_len) + 1
+            if prefix_len > INCREMENTAL_MIN_PREFIX_RATIO * len(raw_output):
+                prompt = self._build_incremental_prompt(
+                    prev_compressed,
+                    raw_output[prefix_len:],
+                    prefix_len,
+                    command,
+                    user_intent,
+                    compression_instructions
+                )
+                return prompt, None
+
+        return self._build_compression_prompt(raw_output, command, user_intent, compression_instructions), None
+
+    def _remember(self, key: tuple, raw_output: str, compressed: str) -> None:
+        """Record the latest compression for key, evicting the oldest command if full."""
+        self._prev[key] = (raw_output, compressed)
+        self._prev.move_to_end(key)
+        while len(self._prev) > MAX_CACHED_COMMANDS:
+            self._prev.popitem(last=False)
 
     def compress(
         self,
@@ -71,34 +239,156 @@ class ClaudeCompressor:
         - subprocess.TimeoutExpired: If compression takes >30s
         - subprocess.CalledProcessError: If claude command fails
         """
-        # Build compression prompt
-        prompt = self._build_compression_prompt(raw_output, command, user_intent, compression_instructions)
+        # Build compression prompt (or reuse the previous result for unchanged output)
+        key = (command, user_intent, compression_instructions)
+        if not compression_instructions:
+            raw_output = _prescrub(raw_output)
+        prompt, cached = self._prepare(key, raw_output, command, user_intent, compression_instructions)
+        if prompt is None:
+            return cached
 
         try:
             # Call claude --print (uses Claude Max subscription)
             # Decision: Use --print for non-interactive mode
+            # Decision: Send prompt on stdin as UTF-8 bytes, not argv
+            # - Large prompts exceed ARG_MAX (E2BIG: "Argument list too long")
+            # - Encoding once here avoids a second argv-encoding copy of the prompt
             result = subprocess.run(
-                ["claude", "--print", prompt],
+                CLAUDE_ARGS,
+                input=prompt.encode("utf-8"),
                 capture_output=True,
-                text=True,
                 timeout=self.timeout,
                 check=True  # Raise exception on non-zero exit
             )
 
-            return result.stdout.strip()
+            compressed = result.stdout.decode("utf-8", errors="replace").strip()
+            self._remember(key, raw_output, compressed)
+            return compressed
 
         except subprocess.TimeoutExpired:
             print(f"Warning: Compression timed out after {self.timeout}s", file=sys.stderr)
             raise
 
         except subprocess.CalledProcessError as e:
-            print(f"Warning: Claude compression failed: {e.stderr}", file=sys.stderr)
+            print(f"Warning: Claude compression failed: {e.stderr.decode('utf-8', errors='replace')}", file=sys.stderr)
             raise
 
         except FileNotFoundError:
             print("Error: 'claude' command not found. Is Claude Code installed?", file=sys.stderr)
             raise
 
+    async def compress_async(
+        self,
+        raw_output: str,
+        command: str,
+        user_intent: str = None,
+        compression_instructions: str = None
+    ) -> str:
+        """
+        Async variant of compress() for event-loop callers (e.g. the MCP server).
+
+        Decision: Run `claude --print` as an asyncio subprocess
+        - The event loop keeps serving other work (concurrent MCP requests, the
+          next batch command) while compression runs
+        - No worker thread is tied up waiting on the model
+
+        Takes the same arguments, returns the same output, and raises the same
+        exceptions as compress().
+        """
+        key = (command, user_intent, compression_instructions)
+        if not compression_instructions:
+            raw_output = _prescrub(raw_output)
+        prompt, cached = self._prepare(key, raw_output, command, user_intent, compression_instructions)
+        if prompt is None:
+            return cached
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *CLAUDE_ARGS,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError:
+            print("Error: 'claude' command not found. Is Claude Code installed?", file=sys.stderr)
+            raise
+
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(input=prompt.encode("utf-8")),
+                timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            print(f"Warning: Compression timed out after {self.timeout}s", file=sys.stderr)
+            raise subprocess.TimeoutExpired(CLAUDE_ARGS, self.timeout)
+
+        if proc.returncode:
+            error = stderr.decode("utf-8", errors="replace")
+            print(f"Warning: Claude compression failed: {error}", file=sys.stderr)
+            raise subprocess.CalledProcessError(proc.returncode, CLAUDE_ARGS, output=stdout, stderr=error)
+
+        compressed = stdout.decode("utf-8", errors="replace").strip()
+        self._remember(key, raw_output, compressed)
+        return compressed
+
+    def _truncate_for_prompt(self, raw_output: str) -> tuple:
+        """
+        Fit raw output into the prompt budget.
+
+        Returns (output_for_prompt, token_count, truncated).
+        """
+        # Truncate large outputs to the input token budget
+        # Decision: Budget by real tokens when tiktoken is available
+        # - Character counts over-truncate CJK/base64 and under-truncate ASCII
+        # - Outputs already within budget skip truncation entirely
+        # Show first 80% + last 20% if truncated
+        budget = self.max_input_tokens
+        enc = self._get_encoding()
+
+        if enc is None:
+            # Count and cut with the same (regex) approximation so the prompt's
+            # "~N tokens" agrees with whether the output was truncated
+            token_count = _approximate_tokens(raw_output)
+            truncated = token_count > budget
+            if truncated:
+                # Keep the budget's share of the tokens as the same share of characters
+                max_chars = len(raw_output) * budget // token_count
+                split_point = int(max_chars * 0.8)
+                remaining = max_chars - split_point
+                output_for_prompt = (
+                    raw_output[:split_point] +
+                    f"\n\n[... {len(raw_output) - max_chars:,} characters omitted ...]\n\n" +
+                    raw_output[-remaining:]
+                )
+            else:
+                output_for_prompt = raw_output
+            return output_for_prompt, token_count, truncated
+
+        # Every token covers at least one UTF-8 byte, so output whose byte length
+        # fits the budget can't exceed it: skip the BPE pass (the prompt header
+        # only shows an approximate token count)
+        output_bytes = len(raw_output) if raw_output.isascii() else len(raw_output.encode("utf-8"))
+        if output_bytes <= budget:
+            return raw_output, _approximate_tokens(raw_output), False
+
+        ids = enc.encode_ordinary(raw_output)
+        token_count = len(ids)
+        truncated = token_count > budget
+        if truncated:
+            split_point = int(budget * 0.8)
+            remaining = budget - split_point
+            output_for_prompt = (
+                enc.decode(ids[:split_point]) +
+                f"\n\n[... {token_count - budget:,} tokens omitted ...]\n\n" +
+                enc.decode(ids[-remaining:])
+            )
+        else:
+            output_for_prompt = raw_output
+
+        return output_for_prompt, token_count, truncated
+
     def _build_compression_prompt(
         self,
         raw_output: str,
@@ -119,25 +409,12 @@ class ClaudeCompressor:
 
         The prompt is the core of this system - it defines what "good compression" means.
         """
-        # Truncate extremely large outputs to prevent prompt overflow
-        # Decision: Claude's context window is 200K tokens
-        # Reserve 50K for prompt + instructions = max 150K for raw output
-        # Approximate: 150K tokens ~= 600K chars (4 chars/token average)
-        MAX_OUTPUT_CHARS = 500_000  # Conservative limit
-
-        if len(raw_output) > MAX_OUTPUT_CHARS:
-            truncated = True
-            # Show first 80% + last 20% if truncated
-            split_point = int(MAX_OUTPUT_CHARS * 0.8)
-            remaining = MAX_OUTPUT_CHARS - split_point
-            output_for_prompt = (
-                raw_output[:split_point] +
-                f"\n\n[... {len(raw_output) - MAX_OUTPUT_CHARS:,} characters omitted ...]\n\n" +
-                raw_output[-remaining:]
-            )
-        else:
-            truncated = False
-            output_for_prompt = raw_output
+        output_for_prompt, token_count, truncated = self._truncate_for_prompt(raw_output)
+
+        # Pick guidelines for the tool that produced the output (e.g. "/usr/bin/kubectl" -> "kubectl")
+        parts = command.split(maxsplit=1)
+        tool = parts[0].rsplit("/", 1)[-1] if parts else ""
+        guidelines = TOOL_GUIDELINES.get(tool, DEFAULT_GUIDELINES)
 
         # Build custom instructions section if provided
         custom_section = ""
@@ -154,7 +431,7 @@ User intent: {user_intent or "Not specified"}
 {f"[Note: Output was truncated for processing]" if truncated else ""}
 {custom_section}
 
-Raw output ({len(raw_output):,} chars, ~{len(raw_output) // 4:,} tokens):
+Raw output ({len(raw_output):,} chars, ~{token_count:,} tokens):
 ```
 {output_for_prompt}
 ```
@@ -163,42 +440,65 @@ Raw output ({len(raw_output):,} chars, ~{len(raw_output) // 4:,} tokens):
 
 **Compression Guidelines**:
 
-1. **Preserve critical data**:
-   - Errors, warnings, status codes
-   - Resource states (running, pending, failed, etc.)
-   - Versions, counts, timestamps (if actionable)
-   - User-facing messages
+{guidelines}
 
-2. **Remove noise**:
-   - UUIDs, internal IDs, request/trace IDs
-   - Debug timestamps (unless part of error)
-   - Verbose metadata (created_by, updated_by, internal_* fields)
-   - Redundant object wrappers
+**Target**: 80-95% token reduction with 0% information loss.
 
-3. **Summarize collections**:
-   - If >7 items: Show 5 most recent/relevant + aggregate rest
-   - Example: "8 failed pods" instead of listing all 8
-   - Provide status breakdown (e.g., "185 running, 8 pending, 3 failed")
+**Output format**: Return ONLY the compressed output (no preamble, no explanations, no "Here's the compressed version:").
 
-4. **Extract error essence**:
-   - Root cause message
-   - Location in user's code (not framework internals)
-   - Actionable suggestion
-   - Skip verbose stack traces (keep top 2-3 frames max)
+Compressed output:"""
 
-5. **Maintain structure**:
-   - Keep JSON structure if it aids clarity
-   - Use markdown formatting for readability
-   - Group related information together
+    def _build_incremental_prompt(
+        self,
+        previous_compressed: str,
+        new_output: str,
+        prefix_len: int,
+        command: str,
+        user_intent: str,
+        compression_instructions: str = None
+    ) -> str:
+        """
+        Build prompt that updates a previous compressed summary with new output only.
 
-6. **Be ruthless**:
-   - If data isn't actionable by the user, omit it
-   - Users can always see raw output if needed
-   - Your job is radical compression while preserving utility
+        Decision: Send the delta, not the whole output
+        - Iterative commands (tailing logs, watching pods) mostly repeat earlier output
+        - The previous summary already covers the shared prefix
+        - Smaller prompt = faster, cheaper compression
+        """
+        output_for_prompt, token_count, truncated = self._truncate_for_prompt(new_output)
 
-**Target**: 80-95% token reduction with 0% information loss.
+        custom_section = ""
+        if compression_instructions:
+            custom_section = f"""
+**CUSTOM COMPRESSION INSTRUCTIONS** (highest priority - follow these first):
+{compression_instructions}
+"""
 
-**Output format**: Return ONLY the compressed output (no preamble, no explanations, no "Here's the compressed version:").
+        return f"""You are helping optimize CLI command output for token efficiency in Claude Code.
+
+Command executed: {command}
+User intent: {user_intent or "Not specified"}
+{f"[Note: New output was truncated for processing]" if truncated else ""}
+{custom_section}
+
+This command was run before. Its output has been compressed to the summary below.
+The new output is identical to the previous one for its first {prefix_len:,} characters;
+everything after that point was replaced by the following ({len(new_output):,} chars, ~{token_count:,} tokens).
+
+Previous compressed summary:
+```
+{previous_compressed}
+```
+
+New output after the shared prefix:
+```
+{output_for_prompt}
+```
+
+**Your task**: Update the compressed summary so it reflects the new output, following the same style.
+Preserve 100% of actionable information (errors, warnings, states, counts) and keep it as short as the previous summary allows.
+
+**Output format**: Return ONLY the updated compressed output (no preamble, no explanations).
 
 Compressed output:"""
 
@@ -228,8 +528,7 @@ storage-provisioner                     1/1     Running            0          45
                 "Testing compression system"
             )
 
-            from token_counter import TokenCounter
-            counter = TokenCounter()
+            counter = get_default_counter()
             metrics = counter.measure_compression(sample_output, compressed)
 
             return {
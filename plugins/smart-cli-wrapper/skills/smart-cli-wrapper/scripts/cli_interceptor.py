@@ -12,17 +12,80 @@ Decision: Execute first, compress if needed
 - If <= threshold: return raw unchanged
 """
 
+import argparse
+import asyncio
+import shlex
+import shutil
 import subprocess
 import sys
 import json
+import threading
+from concurrent.futures import Executor
+from collections import deque
 from typing import Union, Optional
-from pathlib import Path
 
-# Add scripts directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+# Sibling modules resolve from this script's directory (sys.path[0] when run
+# directly; added by mcp_server.py when imported from the MCP server)
+from token_counter import get_default_counter
+from claude_compressor import MAX_INPUT_TOKENS, ClaudeCompressor
 
-from token_counter import TokenCounter
-from claude_compressor import ClaudeCompressor
+# Output capture limits
+# Decision: Bound memory regardless of how much the command prints
+# - Keep first 80% + last 20% of the budget (same split as prompt truncation)
+# - 4 MiB comfortably exceeds what the compressor will ever embed in a prompt
+MAX_CAPTURE_BYTES = 4 * 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+# Output larger than threshold * this many bytes is treated as over threshold
+# without a token count (cl100k_base averages ~4 bytes/token)
+LIKELY_OVER_BYTES_PER_TOKEN = 8
+
+
+class _HeadTailBuffer:
+    """
+    Byte sink that keeps the head and tail of a stream and drops the middle.
+
+    Memory stays bounded by head_bytes + tail_bytes (+ one read chunk).
+    """
+
+    def __init__(self, limit: int = MAX_CAPTURE_BYTES):
+        self.head_limit = int(limit * 0.8)
+        self.tail_limit = limit - self.head_limit
+        self.head = bytearray()
+        self.tail = deque()
+        self.tail_size = 0
+        self.total = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.total += len(chunk)
+
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+            if not chunk:
+                return
+
+        self.tail.append(chunk)
+        self.tail_size += len(chunk)
+        # Drop whole chunks that fall entirely outside the tail window
+        while self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            self.tail_size -= len(self.tail.popleft())
+
+    def getvalue(self) -> bytes:
+        tail = b"".join(self.tail)[-self.tail_limit:] if self.tail_limit else b""
+        omitted = self.total - len(self.head) - len(tail)
+        if omitted <= 0:
+            return bytes(self.head) + tail
+        marker = f"\n\n[... {omitted:,} bytes omitted ...]\n\n".encode()
+        return bytes(self.head) + marker + tail
+
+
+def _drain(stream, buf: _HeadTailBuffer) -> None:
+    """Copy a pipe into a bounded buffer until EOF."""
+    with stream:
+        for chunk in iter(lambda: stream.read1(READ_CHUNK_BYTES), b""):
+            buf.write(chunk)
 
 
 class CLIInterceptor:
@@ -36,7 +99,8 @@ class CLIInterceptor:
         self,
         threshold_tokens: int = 500,
         compression_timeout: int = 30,
-        model: str = "haiku"
+        model: str = "haiku",
+        max_input_tokens: int = MAX_INPUT_TOKENS
     ):
         """
         Initialize interceptor.
@@ -45,10 +109,200 @@ class CLIInterceptor:
         - threshold_tokens: Only compress if output > this many tokens (default: 500)
         - compression_timeout: Max seconds for compression (default: 30)
         - model: "haiku" (fast) or "sonnet" (quality)
+        - max_input_tokens: Output sent to the compressor is truncated to this many tokens (default: 8000)
         """
         self.threshold = threshold_tokens
-        self.counter = TokenCounter()
-        self.compressor = ClaudeCompressor(model=model, timeout=compression_timeout)
+        self.counter = get_default_counter()
+        self.compressor = ClaudeCompressor(
+            model=model,
+            timeout=compression_timeout,
+            max_input_tokens=max_input_tokens
+        )
+
+    def _run_command(self, command_list: list[str], timeout: Optional[int]) -> tuple[int, str, str, int]:
+        """
+        Run command, streaming stdout/stderr through bounded head/tail buffers.
+
+        Decision: Never hold the full output in memory
+        - A command printing gigabytes of logs is capped at MAX_CAPTURE_BYTES per stream
+        - Both pipes are drained concurrently so neither can fill up and block the child
+
+        Returns (returncode, stdout, stderr, total_bytes) where total_bytes counts
+        everything the command printed, including bytes dropped from the middle.
+
+        Raises:
+        - subprocess.TimeoutExpired: If the command exceeds timeout (partial stdout attached)
+        - FileNotFoundError: If the executable does not exist
+        """
+        # Decision: Let Popen use posix_spawn instead of fork + exec
+        # - fork copies the page tables of this process (tiktoken's BPE tables included)
+        # - CPython only takes the posix_spawn path with close_fds=False and an
+        #   executable path containing a directory, so resolve it on PATH here
+        # - Safe to inherit fds: Python creates them non-inheritable (PEP 446)
+        proc = subprocess.Popen(
+            command_list,
+            executable=shutil.which(command_list[0]) if command_list else None,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=READ_CHUNK_BYTES,
+            close_fds=False
+        )
+
+        out_buf = _HeadTailBuffer()
+        err_buf = _HeadTailBuffer()
+        readers = [
+            threading.Thread(target=_drain, args=(proc.stdout, out_buf), daemon=True),
+            threading.Thread(target=_drain, args=(proc.stderr, err_buf), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        try:
+            returncode = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            for reader in readers:
+                reader.join()
+            raise subprocess.TimeoutExpired(
+                command_list,
+                timeout,
+                output=out_buf.getvalue().decode("utf-8", errors="replace")
+            )
+
+        for reader in readers:
+            reader.join()
+
+        return (
+            returncode,
+            out_buf.getvalue().decode("utf-8", errors="replace"),
+            err_buf.getvalue().decode("utf-8", errors="replace"),
+            out_buf.total + err_buf.total
+        )
+
+    @staticmethod
+    def _split_command(command: Union[str, list[str]]) -> tuple[list[str], str]:
+        """
+        Return (argv list, display string) for a string or list command.
+
+        Decision: Split with shlex, not str.split
+        - Quoted arguments stay intact (kubectl get pods -l "app=foo bar")
+        - String commands keep their original text for display/prompting
+        """
+        if isinstance(command, str):
+            return shlex.split(command), command
+        return command, shlex.join(command)
+
+    def _capture(
+        self,
+        command_list: list[str],
+        timeout: Optional[int]
+    ) -> tuple[int, str, Optional[int], bool]:
+        """
+        Run command and count tokens in its combined output.
+
+        Returns (returncode, raw_output, raw_tokens, over_threshold). raw_tokens is
+        None when the output size alone settles the threshold check: too small to
+        exceed it (never counted) or certainly over it (counted after compression).
+        """
+        returncode, stdout, stderr, total_bytes = self._run_command(command_list, timeout)
+
+        # Combine stdout and stderr
+        raw_output = stdout
+        if stderr:
+            raw_output += f"\n{stderr}"
+
+        raw_output = raw_output.strip()
+
+        # Decision: Skip tiktoken entirely for output that can't exceed threshold
+        # - Every cl100k_base token covers at least one UTF-8 byte, so bytes bound tokens
+        # - isascii() is O(1); only non-ASCII output pays for an encode to measure bytes
+        # - Small output is the common case, so most calls do no BPE pass at all
+        output_bytes = len(raw_output) if raw_output.isascii() else len(raw_output.encode("utf-8"))
+        if output_bytes <= self.threshold:
+            return returncode, raw_output, None, False
+
+        # Decision: Skip the up-front count for output far over threshold
+        # - Compression is all but certain, so the count only feeds metrics
+        # - Raw and compressed output are then counted together in one batch
+        if total_bytes > self.threshold * LIKELY_OVER_BYTES_PER_TOKEN:
+            return returncode, raw_output, None, True
+
+        # Count tokens in raw output
+        raw_tokens = self.counter.count_tokens(raw_output)
+
+        return returncode, raw_output, raw_tokens, raw_tokens > self.threshold
+
+    def _build_result(
+        self,
+        returncode: int,
+        raw_output: str,
+        raw_tokens: Optional[int],
+        over_threshold: bool,
+        compressed_output: Optional[str]
+    ) -> dict:
+        """Measure compressed output, apply the no-inflation safety check, and build the result dict."""
+        compression_applied = False
+        compressed_tokens = None
+        tokens_saved = 0
+        compression_ratio = 0
+
+        if compressed_output is not None:
+            if raw_tokens is None:
+                raw_tokens, compressed_tokens = self.counter.count_tokens_batch([raw_output, compressed_output])
+            else:
+                compressed_tokens = self.counter.count_tokens(compressed_output)
+
+            # Safety check: Don't use compression if it inflates tokens
+            if compressed_tokens >= raw_tokens:
+                print(
+                    f"Warning: Compression inflated tokens ({raw_tokens} → {compressed_tokens}). "
+                    f"Using raw output.",
+                    file=sys.stderr
+                )
+                compressed_output = None
+                compressed_tokens = None
+            else:
+                compression_applied = True
+                tokens_saved = raw_tokens - compressed_tokens
+                compression_ratio = tokens_saved / raw_tokens if raw_tokens > 0 else 0
+        elif raw_tokens is None and over_threshold:
+            # Compression failed on output that skipped the up-front count
+            raw_tokens = self.counter.count_tokens(raw_output)
+
+        return {
+            "success": returncode == 0,
+            "exit_code": returncode,
+            "raw": raw_output,
+            "compressed": compressed_output,
+            "raw_tokens": raw_tokens,
+            "compressed_tokens": compressed_tokens,
+            "compression_applied": compression_applied,
+            "tokens_saved": tokens_saved,
+            "compression_ratio": compression_ratio,
+            "reduction_percent": f"{compression_ratio * 100:.1f}%" if compression_applied else "0.0%"
+        }
+
+    @staticmethod
+    def _error_result(e: Exception, command_list: list[str], timeout: Optional[int]) -> dict:
+        """Build the result dict for a command that could not be executed."""
+        if isinstance(e, subprocess.TimeoutExpired):
+            error = f"Command timed out after {timeout}s"
+            raw = str(e.stdout) if e.stdout else ""
+        elif isinstance(e, FileNotFoundError):
+            error = f"Command not found: {command_list[0]}"
+            raw = ""
+        else:
+            error = f"Execution failed: {str(e)}"
+            raw = ""
+
+        return {
+            "success": False,
+            "exit_code": -1,
+            "error": error,
+            "raw": raw,
+            "compression_applied": False
+        }
 
     def execute_with_compression(
         self,
@@ -72,42 +326,25 @@ class CLIInterceptor:
         - exit_code: Command exit code
         - raw: Original output
         - compressed: Compressed output (if threshold exceeded, else None)
-        - raw_tokens: Token count of raw output
+        - raw_tokens: Token count of raw output (None if too short to need counting)
         - compressed_tokens: Token count of compressed output (if compressed)
         - compression_applied: Boolean
         - tokens_saved: Absolute reduction (if compressed)
         - compression_ratio: Percentage reduction (if compressed)
         - error: Error message (if command failed)
         """
-        # Convert string command to list if needed
-        if isinstance(command, str):
-            command_list = command.split()
-            command_str = command
-        else:
-            command_list = command
-            command_str = " ".join(command)
-
         try:
-            # Execute the command
-            result = subprocess.run(
-                command_list,
-                capture_output=True,
-                text=True,
-                timeout=timeout
-            )
-
-            # Combine stdout and stderr
-            raw_output = result.stdout
-            if result.stderr:
-                raw_output += f"\n{result.stderr}"
+            command_list, command_str = self._split_command(command)
+        except ValueError as e:
+            # Unbalanced quotes in a string command
+            return self._error_result(e, [], timeout)
 
-            raw_output = raw_output.strip()
-
-            # Count tokens in raw output
-            raw_tokens = self.counter.count_tokens(raw_output)
+        try:
+            returncode, raw_output, raw_tokens, over_threshold = self._capture(command_list, timeout)
 
             # Decision: Compress if exceeds threshold
-            if raw_tokens > self.threshold:
+            compressed_output = None
+            if over_threshold:
                 try:
                     compressed_output = self.compressor.compress(
                         raw_output,
@@ -115,196 +352,273 @@ class CLIInterceptor:
                         user_intent,
                         compression_instructions
                     )
-
-                    compressed_tokens = self.counter.count_tokens(compressed_output)
-                    tokens_saved = raw_tokens - compressed_tokens
-                    compression_ratio = tokens_saved / raw_tokens if raw_tokens > 0 else 0
-
-                    # Safety check: Don't use compression if it inflates tokens
-                    if compressed_tokens >= raw_tokens:
-                        print(
-                            f"Warning: Compression inflated tokens ({raw_tokens} → {compressed_tokens}). "
-                            f"Using raw output.",
-                            file=sys.stderr
-                        )
-                        compression_applied = False
-                        compressed_output = None
-                        compressed_tokens = None
-                        tokens_saved = 0
-                        compression_ratio = 0
-                    else:
-                        compression_applied = True
-
                 except Exception as e:
                     print(f"Warning: Compression failed: {e}. Using raw output.", file=sys.stderr)
-                    compression_applied = False
-                    compressed_output = None
-                    compressed_tokens = None
-                    tokens_saved = 0
-                    compression_ratio = 0
-            else:
-                # Below threshold - no compression needed
-                compression_applied = False
-                compressed_output = None
-                compressed_tokens = None
-                tokens_saved = 0
-                compression_ratio = 0
-
-            return {
-                "success": result.returncode == 0,
-                "exit_code": result.returncode,
-                "raw": raw_output,
-                "compressed": compressed_output,
-                "raw_tokens": raw_tokens,
-                "compressed_tokens": compressed_tokens,
-                "compression_applied": compression_applied,
-                "tokens_saved": tokens_saved,
-                "compression_ratio": compression_ratio,
-                "reduction_percent": f"{compression_ratio * 100:.1f}%" if compression_applied else "0.0%"
-            }
-
-        except subprocess.TimeoutExpired as e:
-            return {
-                "success": False,
-                "exit_code": -1,
-                "error": f"Command timed out after {timeout}s",
-                "raw": str(e.stdout) if e.stdout else "",
-                "compression_applied": False
-            }
-
-        except FileNotFoundError as e:
-            return {
-                "success": False,
-                "exit_code": -1,
-                "error": f"Command not found: {command_list[0]}",
-                "raw": "",
-                "compression_applied": False
-            }
+
+            return self._build_result(returncode, raw_output, raw_tokens, over_threshold, compressed_output)
 
         except Exception as e:
-            return {
-                "success": False,
-                "exit_code": -1,
-                "error": f"Execution failed: {str(e)}",
-                "raw": "",
-                "compression_applied": False
-            }
+            return self._error_result(e, command_list, timeout)
 
+    async def execute_with_compression_async(
+        self,
+        command: Union[str, list[str]],
+        user_intent: Optional[str] = None,
+        compression_instructions: Optional[str] = None,
+        timeout: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> dict:
+        """
+        Async variant of execute_with_compression().
 
-def main():
-    """CLI interface for testing and using the interceptor."""
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python3 cli_interceptor.py execute <command>                           # Execute with compression")
-        print("  python3 cli_interceptor.py execute <command> --intent <text>           # With user intent")
-        print("  python3 cli_interceptor.py execute <command> --compress <instructions> # Custom compression")
-        print("  python3 cli_interceptor.py test                                        # Run test")
-        print("")
-        print("Examples:")
-        print("  python3 cli_interceptor.py execute 'kubectl get pods -A'")
-        print("  python3 cli_interceptor.py execute 'kubectl get pods' --intent 'Find failing pods'")
-        print("  python3 cli_interceptor.py execute 'aws ec2 describe-instances' --compress 'Show only running instances as table'")
-        print("  python3 cli_interceptor.py execute 'kubectl logs pod-name' --compress 'Extract errors and warnings only'")
-        sys.exit(1)
-
-    command = sys.argv[1]
-
-    if command == "test":
-        # Run a simple test
-        print("Running interceptor test...", file=sys.stderr)
-
-        interceptor = CLIInterceptor(threshold_tokens=50)  # Low threshold for testing
-
-        # Test with a simple command that will likely exceed threshold
-        result = interceptor.execute_with_compression(
-            "ls -la",
-            user_intent="Testing compression system"
-        )
+        Decision: Await the compression call instead of blocking a thread on it
+        - Command execution + token counting run in `executor` (default loop executor)
+        - `claude --print` runs as an asyncio subprocess, so the event loop keeps
+          serving other requests while the model works
 
-        if result["success"]:
-            print("\n✓ Test successful!\n", file=sys.stderr)
-            print("Results:", file=sys.stderr)
-            print(f"  Raw output: {len(result['raw'])} chars, {result['raw_tokens']} tokens", file=sys.stderr)
+        Takes the same arguments and returns the same dict as execute_with_compression().
+        """
+        try:
+            command_list, command_str = self._split_command(command)
+        except ValueError as e:
+            # Unbalanced quotes in a string command
+            return self._error_result(e, [], timeout)
+        loop = asyncio.get_running_loop()
 
-            if result["compression_applied"]:
-                print(f"  Compressed: {len(result['compressed'])} chars, {result['compressed_tokens']} tokens", file=sys.stderr)
-                print(f"  Savings: {result['tokens_saved']} tokens ({result['reduction_percent']})", file=sys.stderr)
-                print("\nCompressed output:", file=sys.stderr)
-                print(result["compressed"])
-            else:
-                print(f"  No compression (below threshold or failed)", file=sys.stderr)
-                print("\nRaw output:", file=sys.stderr)
-                print(result["raw"])
+        try:
+            captured = await loop.run_in_executor(executor, self._capture, command_list, timeout)
+            return await self._compress_captured_async(
+                captured, command_str, user_intent, compression_instructions
+            )
+
+        except Exception as e:
+            return self._error_result(e, command_list, timeout)
+
+    async def _compress_captured_async(
+        self,
+        captured: tuple[int, str, Optional[int], bool],
+        command_str: str,
+        user_intent: Optional[str],
+        compression_instructions: Optional[str]
+    ) -> dict:
+        """Compress a _capture() result if it is over threshold and build the result dict."""
+        returncode, raw_output, raw_tokens, over_threshold = captured
+
+        # Decision: Compress if exceeds threshold
+        compressed_output = None
+        if over_threshold:
+            try:
+                compressed_output = await self.compressor.compress_async(
+                    raw_output,
+                    command_str,
+                    user_intent,
+                    compression_instructions
+                )
+            except Exception as e:
+                print(f"Warning: Compression failed: {e}. Using raw output.", file=sys.stderr)
+
+        return self._build_result(returncode, raw_output, raw_tokens, over_threshold, compressed_output)
+
+    async def execute_batch_async(
+        self,
+        commands: list[Union[str, list[str]]],
+        user_intent: Optional[str] = None,
+        compression_instructions: Optional[str] = None,
+        timeout: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> list[dict]:
+        """
+        Execute several commands, overlapping each compression with the next command.
+
+        Decision: Two-stage pipeline
+        - Commands run one at a time, in order (like a shell script)
+        - A command's compression runs in the background while the next command
+          executes, so wall time approaches max(sum of commands, sum of
+          compressions) instead of their total
+        - At most one compression is in flight: a command finishing faster than
+          the previous compression waits for it, instead of piling up
+          concurrent `claude --print` processes
+
+        Returns one execute_with_compression() result dict per command, in order.
+        """
+        loop = asyncio.get_running_loop()
+        results = []  # result dicts, or tasks still compressing
+        pending = None  # the one compression allowed in flight
+
+        for command in commands:
+            try:
+                command_list, command_str = self._split_command(command)
+            except ValueError as e:
+                results.append(self._error_result(e, [], timeout))
+                continue
+
+            try:
+                captured = await loop.run_in_executor(executor, self._capture, command_list, timeout)
+            except Exception as e:
+                results.append(self._error_result(e, command_list, timeout))
+                continue
+
+            if pending is not None:
+                await pending
+            pending = asyncio.create_task(self._compress_captured_async(
+                captured, command_str, user_intent, compression_instructions
+            ))
+            results.append(pending)
+
+        return [await r if isinstance(r, asyncio.Task) else r for r in results]
+
+
+def _format_tokens(raw_tokens: Optional[int], threshold: int) -> str:
+    """Render raw_tokens for display (None means too short to need a count)."""
+    return str(raw_tokens) if raw_tokens is not None else f"<= {threshold}"
+
+
+def _report(result: dict, interceptor: CLIInterceptor) -> None:
+    """Print an execute_with_compression() result: stats to stderr, output to stdout."""
+    if result["success"]:
+        print(f"\n✓ Command succeeded (exit code: {result['exit_code']})", file=sys.stderr)
+        raw_tokens = result['raw_tokens']
+        print(f"Raw output: {_format_tokens(raw_tokens, interceptor.threshold)} tokens", file=sys.stderr)
+
+        if result["compression_applied"]:
+            print(f"Compressed: {result['compressed_tokens']} tokens", file=sys.stderr)
+            print(f"Saved: {result['tokens_saved']} tokens ({result['reduction_percent']})", file=sys.stderr)
+            print("\n--- Compressed Output ---")
+            print(result["compressed"])
         else:
-            print(f"\n✗ Test failed: {result.get('error', 'Unknown error')}", file=sys.stderr)
-            sys.exit(1)
+            reason = "below threshold" if raw_tokens is None or raw_tokens <= interceptor.threshold else "compression failed"
+            print(f"No compression applied ({reason})", file=sys.stderr)
+            print("\n--- Raw Output ---")
+            print(result["raw"])
+    else:
+        print(f"\n✗ Command failed (exit code: {result['exit_code']})", file=sys.stderr)
+        print(f"Error: {result.get('error', 'Unknown error')}", file=sys.stderr)
+        if result.get("raw"):
+            print("\n--- Output ---")
+            print(result["raw"])
+
+
+def _run_test() -> int:
+    """Run a simple end-to-end test with a low threshold."""
+    print("Running interceptor test...", file=sys.stderr)
+
+    interceptor = CLIInterceptor(threshold_tokens=50)  # Low threshold for testing
+
+    # Test with a simple command that will likely exceed threshold
+    result = interceptor.execute_with_compression(
+        "ls -la",
+        user_intent="Testing compression system"
+    )
+
+    if not result["success"]:
+        print(f"\n✗ Test failed: {result.get('error', 'Unknown error')}", file=sys.stderr)
+        return 1
+
+    print("\n✓ Test successful!\n", file=sys.stderr)
+    print("Results:", file=sys.stderr)
+    print(
+        f"  Raw output: {len(result['raw'])} chars, "
+        f"{_format_tokens(result['raw_tokens'], interceptor.threshold)} tokens",
+        file=sys.stderr
+    )
+
+    if result["compression_applied"]:
+        print(f"  Compressed: {len(result['compressed'])} chars, {result['compressed_tokens']} tokens", file=sys.stderr)
+        print(f"  Savings: {result['tokens_saved']} tokens ({result['reduction_percent']})", file=sys.stderr)
+        print("\nCompressed output:", file=sys.stderr)
+        print(result["compressed"])
+    else:
+        print(f"  No compression (below threshold or failed)", file=sys.stderr)
+        print("\nRaw output:", file=sys.stderr)
+        print(result["raw"])
+    return 0
 
-    elif command == "execute":
-        if len(sys.argv) < 3:
-            print("Error: Provide command to execute", file=sys.stderr)
-            sys.exit(1)
 
-        cmd = sys.argv[2]
-
-        # Parse optional flags
-        user_intent = None
-        compression_instructions = None
-
-        i = 3
-        while i < len(sys.argv):
-            if sys.argv[i] == "--intent":
-                if i + 1 < len(sys.argv):
-                    user_intent = sys.argv[i + 1]
-                    i += 2
-                else:
-                    print("Error: --intent flag requires an argument", file=sys.stderr)
-                    sys.exit(1)
-            elif sys.argv[i] == "--compress":
-                if i + 1 < len(sys.argv):
-                    compression_instructions = sys.argv[i + 1]
-                    i += 2
-                else:
-                    print("Error: --compress flag requires an argument", file=sys.stderr)
-                    sys.exit(1)
-            else:
-                print(f"Error: Unknown flag: {sys.argv[i]}", file=sys.stderr)
-                sys.exit(1)
+def _read_batch(f) -> list[str]:
+    """Read one command per line, skipping blank lines and # comments."""
+    commands = []
+    for line in f:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            commands.append(line)
+    return commands
 
-        interceptor = CLIInterceptor()
 
-        print(f"Executing: {cmd}", file=sys.stderr)
-        if user_intent:
-            print(f"Intent: {user_intent}", file=sys.stderr)
-        if compression_instructions:
-            print(f"Compression instructions: {compression_instructions}", file=sys.stderr)
+def main():
+    """CLI interface for testing and using the interceptor."""
+    parser = argparse.ArgumentParser(
+        prog="cli_interceptor.py",
+        description="Execute CLI commands and compress output that exceeds the token threshold.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=(
+            "Examples:\n"
+            "  python3 cli_interceptor.py execute 'kubectl get pods -A'\n"
+            "  python3 cli_interceptor.py execute 'kubectl get pods' --intent 'Find failing pods'\n"
+            "  python3 cli_interceptor.py execute 'aws ec2 describe-instances' --compress 'Show only running instances as table'\n"
+            "  python3 cli_interceptor.py execute 'kubectl logs pod-name' --compress 'Extract errors and warnings only'\n"
+            "  python3 cli_interceptor.py batch commands.txt --intent 'Cluster health check'"
+        )
+    )
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    # Shared --intent/--compress flags for execute and batch
+    compression_flags = argparse.ArgumentParser(add_help=False)
+    compression_flags.add_argument("--intent", help="What you're trying to accomplish (helps compression)")
+    compression_flags.add_argument("--compress", help="Custom compression instructions")
+
+    execute_parser = subparsers.add_parser(
+        "execute", parents=[compression_flags], help="Execute a command with compression"
+    )
+    execute_parser.add_argument("cmd", help="Command to execute")
+
+    # Decision: Batch mode runs many commands in one process
+    # - Token encoding load and compressor setup are paid once, not per command
+    batch_parser = subparsers.add_parser(
+        "batch", parents=[compression_flags], help="Execute commands from a file, one per line"
+    )
+    batch_parser.add_argument(
+        "file", type=argparse.FileType("r"), help="File of commands ('-' for stdin); # starts a comment"
+    )
+
+    subparsers.add_parser("test", help="Run test")
+
+    args = parser.parse_args()
+
+    if args.mode == "test":
+        sys.exit(_run_test())
+
+    interceptor = CLIInterceptor()
+
+    if args.mode == "execute":
+        print(f"Executing: {args.cmd}", file=sys.stderr)
+        if args.intent:
+            print(f"Intent: {args.intent}", file=sys.stderr)
+        if args.compress:
+            print(f"Compression instructions: {args.compress}", file=sys.stderr)
+
+        result = interceptor.execute_with_compression(args.cmd, args.intent, args.compress)
+        _report(result, interceptor)
+        if not result["success"]:
+            sys.exit(result["exit_code"])
 
-        result = interceptor.execute_with_compression(cmd, user_intent, compression_instructions)
+    elif args.mode == "batch":
+        with args.file:
+            commands = _read_batch(args.file)
 
-        if result["success"]:
-            print(f"\n✓ Command succeeded (exit code: {result['exit_code']})", file=sys.stderr)
-            print(f"Raw output: {result['raw_tokens']} tokens", file=sys.stderr)
+        print(f"Executing {len(commands)} commands...", file=sys.stderr)
+        results = asyncio.run(interceptor.execute_batch_async(commands, args.intent, args.compress))
 
-            if result["compression_applied"]:
-                print(f"Compressed: {result['compressed_tokens']} tokens", file=sys.stderr)
-                print(f"Saved: {result['tokens_saved']} tokens ({result['reduction_percent']})", file=sys.stderr)
-                print("\n--- Compressed Output ---")
-                print(result["compressed"])
-            else:
-                reason = "below threshold" if result['raw_tokens'] <= interceptor.threshold else "compression failed"
-                print(f"No compression applied ({reason})", file=sys.stderr)
-                print("\n--- Raw Output ---")
-                print(result["raw"])
-        else:
-            print(f"\n✗ Command failed (exit code: {result['exit_code']})", file=sys.stderr)
-            print(f"Error: {result.get('error', 'Unknown error')}", file=sys.stderr)
-            if result.get("raw"):
-                print("\n--- Output ---")
-                print(result["raw"])
-            sys.exit(result["exit_code"])
+        failed = 0
+        for cmd, result in zip(commands, results):
+            print(f"\n=== {cmd} ===")
+            sys.stdout.flush()
+            _report(result, interceptor)
+            if not result["success"]:
+                failed += 1
 
-    else:
-        print(f"Unknown command: {command}", file=sys.stderr)
-        sys.exit(1)
+        print(f"\n{len(commands) - failed}/{len(commands)} commands succeeded", file=sys.stderr)
+        if failed:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
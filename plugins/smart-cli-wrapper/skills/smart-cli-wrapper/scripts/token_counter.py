@@ -2,15 +2,17 @@
 """
 Token Counting for CLI Output Compression
 
-Uses tiktoken if available, falls back to character-based approximation.
+Uses tiktoken if available, falls back to a regex-based approximation.
 
 Decision: Make tiktoken optional
 - Prefer tiktoken for accuracy (matches Claude's actual token counting)
-- Fall back to chars/4 approximation if tiktoken not available
+- Fall back to word/punctuation/CJK approximation if tiktoken not available
 - Skill works out of the box with zero setup required
 """
 
+import functools
 import json
+import re
 import sys
 from typing import Union
 
@@ -22,17 +24,55 @@ except ImportError:
     TIKTOKEN_AVAILABLE = False
 
 
+# Fallback tokenizer approximation
+# Decision: Count BPE-like units instead of chars/4
+# - chars/4 badly underestimates code/logs (dense punctuation) and CJK (~1 token per char)
+# - Each CJK character, each punctuation mark and each word run counts as one token
+# - Close enough to cl100k_base to route the compression threshold correctly
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]|[^\W{_CJK}]+|[^\w\s]")
+
+
+def _approximate_tokens(text: str) -> int:
+    """Approximate cl100k_base token count without tiktoken (regex scan runs in C)."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def _as_text(value: Union[str, dict, list]) -> str:
+    """
+    Serialize dict/list values for counting; strings pass through.
+
+    Decision: Count compact JSON
+    - Indentation and spaces after separators add tokens without adding information
+    """
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(name: str = "cl100k_base"):
+    """
+    Load a tiktoken encoding once per process.
+
+    Decision: Share one Encoding across all counters/compressors
+    - Loading cl100k_base decodes a multi-MB BPE merge table
+    - For short-lived CLI runs this load dominates startup
+    """
+    return tiktoken.get_encoding(name)
+
+
 class TokenCounter:
     """
     Count tokens using tiktoken (cl100k_base encoding - same as Claude).
 
-    Falls back to character-based approximation if tiktoken not installed.
+    Falls back to regex-based approximation if tiktoken not installed.
     """
 
     def __init__(self):
         if TIKTOKEN_AVAILABLE:
             # Use cl100k_base encoding (used by GPT-4, Claude, and modern LLMs)
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+            self.encoding = get_encoding("cl100k_base")
             self.method = "tiktoken"
         else:
             self.encoding = None
@@ -40,29 +80,45 @@ class TokenCounter:
             # Only print warning once on first use
             if not hasattr(TokenCounter, '_warned'):
                 print(
-                    "Note: tiktoken not available, using character-based approximation (chars/4). "
+                    "Note: tiktoken not available, using word/punctuation-based approximation. "
                     "For exact counts, install tiktoken: pip install tiktoken",
                     file=sys.stderr
                 )
                 TokenCounter._warned = True
 
-    def count_tokens(self, text: str) -> int:
+    def count_tokens(self, text: Union[str, dict, list]) -> int:
         """
-        Count tokens in text.
+        Count tokens in text (dicts/lists are counted as compact JSON).
 
-        Uses tiktoken if available, otherwise approximates with chars/4.
+        Uses tiktoken if available, otherwise approximates by counting words,
+        punctuation marks and CJK characters.
         Approximation is good enough for threshold checks and compression metrics.
         """
-        if isinstance(text, dict) or isinstance(text, list):
-            text = json.dumps(text, indent=2)
+        return self._count_tokens_str(_as_text(text))
 
+    def _count_tokens_str(self, text: str) -> int:
+        """Count tokens in an already-serialized string."""
         if self.encoding:
-            # Accurate count using tiktoken
-            return len(self.encoding.encode(text))
+            # Accurate count using tiktoken; encode_ordinary treats special-token
+            # text like "<|endoftext|>" as plain text instead of raising
+            return len(self.encoding.encode_ordinary(text))
         else:
-            # Approximation: ~4 chars per token (good enough for our use case)
-            # This matches Claude Code's own approximation
-            return len(text) // 4
+            return _approximate_tokens(text)
+
+    def count_tokens_batch(self, texts: list[str]) -> list[int]:
+        """
+        Count tokens for several texts in one call.
+
+        Decision: Encode each text with encode_ordinary, same as _count_tokens_str
+        - Both paths tokenize identically (special-token text never raises)
+        - tiktoken's encode_ordinary_batch is only a Python wrapper that starts a
+          new ThreadPoolExecutor per call; callers pass two texts, so the pool
+          costs more than it saves
+        """
+        if self.encoding:
+            return [len(self.encoding.encode_ordinary(text)) for text in texts]
+        else:
+            return [_approximate_tokens(text) for text in texts]
 
     def measure_compression(self, raw: Union[str, dict], compressed: Union[str, dict]) -> dict:
         """
@@ -76,12 +132,8 @@ class TokenCounter:
         - reduction_percent: Human-readable percentage
         - efficiency_multiplier: How many times more efficient
         """
-        # Convert to strings if needed
-        raw_str = json.dumps(raw, indent=2) if isinstance(raw, (dict, list)) else raw
-        comp_str = json.dumps(compressed, indent=2) if isinstance(compressed, (dict, list)) else compressed
-
-        raw_tokens = self.count_tokens(raw_str)
-        comp_tokens = self.count_tokens(comp_str)
+        # Serialize once; the batch count works on strings only
+        raw_tokens, comp_tokens = self.count_tokens_batch([_as_text(raw), _as_text(compressed)])
         tokens_saved = raw_tokens - comp_tokens
 
         compression_ratio = tokens_saved / raw_tokens if raw_tokens > 0 else 0
@@ -96,6 +148,12 @@ class TokenCounter:
         }
 
 
+@functools.lru_cache(maxsize=1)
+def get_default_counter() -> TokenCounter:
+    """Return the process-wide TokenCounter shared by interceptors."""
+    return TokenCounter()
+
+
 def main():
     """CLI interface for testing token counting."""
     if len(sys.argv) < 2:
@@ -3,59 +3,199 @@
 Fetch a Tempo documentation page by path.
 
 Usage:
-    python fetch_docs.py <path>
+    python fetch_docs.py <path> [<path> ...]
     
 Examples:
     python fetch_docs.py /protocol/tip20/overview
     python fetch_docs.py /guide/payments
     python fetch_docs.py /quickstart/evm-compatibility
+    python fetch_docs.py /guide/payments /protocol/fees
 
-The script fetches the page from docs.tempo.xyz and extracts the main content.
+The script fetches each page from docs.tempo.xyz and extracts the main content.
 
 Note: Requires network access to docs.tempo.xyz. In Claude Code, ensure your
 network settings allow this domain. If network access is restricted, use the
 local reference files in references/ directory instead.
 """
 
+import codecs
+import hashlib
+import json
+import os
 import sys
-import urllib.request
-import urllib.error
 import re
-import html
-
-def strip_html_tags(text):
-    """Remove HTML tags and decode entities."""
-    # Remove script and style elements
-    text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    # Remove navigation elements
-    text = re.sub(r'<nav[^>]*>.*?</nav>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<header[^>]*>.*?</header>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<footer[^>]*>.*?</footer>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert headers to markdown
-    text = re.sub(r'<h1[^>]*>(.*?)</h1>', r'\n# \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<h2[^>]*>(.*?)</h2>', r'\n## \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<h3[^>]*>(.*?)</h3>', r'\n### \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<h4[^>]*>(.*?)</h4>', r'\n#### \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert code blocks
-    text = re.sub(r'<pre[^>]*><code[^>]*>(.*?)</code></pre>', r'\n```\n\1\n```\n', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<code[^>]*>(.*?)</code>', r'`\1`', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert links - extract href and text
-    text = re.sub(r'<a[^>]*href="([^"]*)"[^>]*>(.*?)</a>', r'[\2](\1)', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert lists
-    text = re.sub(r'<li[^>]*>(.*?)</li>', r'- \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert paragraphs
-    text = re.sub(r'<p[^>]*>(.*?)</p>', r'\1\n\n', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert line breaks
-    text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
-    # Remove remaining HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    # Decode HTML entities
-    text = html.unescape(text)
-    # Clean up whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' +', ' ', text)
-    return text.strip()
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = "https://docs.tempo.xyz"
+
+# Concurrent page fetches when several paths are given (network-bound)
+MAX_WORKERS = 16
+
+# One keep-alive session for the process: fetching several paths reuses
+# pooled TCP + TLS connections instead of a fresh handshake per page
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
+_SESSION.headers.update({'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'})
+
+# Converted pages from previous runs, one JSON file per path:
+# {"etag", "last_modified", "markdown"}
+# Decision: Revalidate with If-None-Match / If-Modified-Since
+# - Unchanged pages come back as a header-only 304, so repeat fetches skip
+#   both the download and the HTML conversion
+# - Kept in the temp dir: it's a disposable cache, not reference material
+PAGE_CACHE_DIR = Path(tempfile.gettempdir()) / "tempo_docs_cache"
+
+# Response bytes handed to the parser per read
+CHUNK_SIZE = 64 * 1024
+
+# Blank-line runs and space runs, collapsed in one pass
+_RE_WHITESPACE = re.compile(r'\n{3,}| {2,}')
+
+def _whitespace(match):
+    return '\n\n' if match.group().startswith('\n') else ' '
+
+class _MarkdownExtractor(HTMLParser):
+    """
+    Single-pass HTML to markdown converter (shared with generate_doc_map.py).
+
+    Replaces the old cascade of regex substitutions (one full scan each).
+    Emits headings, code, links, list items, paragraphs and line breaks as
+    markdown, drops script/style/nav/header/footer, and remembers where
+    <main>/<article> start and end so the main content can be sliced out.
+    """
+
+    SKIP_TAGS = {'script', 'style', 'nav', 'header', 'footer'}
+    WRAP_TAGS = {'h1', 'h2', 'h3', 'h4', 'code', 'a', 'li', 'p'}
+    HEADING_PREFIX = {'h1': '#', 'h2': '##', 'h3': '###', 'h4': '####'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []  # (tag, start index into out, href)
+        self.skip_depth = 0
+        self.pre_depth = 0
+        self.regions = {}  # 'main'/'article' -> [start, end]
+
+    @property
+    def done(self):
+        """True once </main> has closed; nothing after it reaches the output."""
+        region = self.regions.get('main')
+        return region is not None and region[1] is not None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+
+        if tag == 'br':
+            self.out.append('\n')
+        elif tag in ('main', 'article'):
+            self.regions.setdefault(tag, [len(self.out), None])
+        elif tag == 'pre':
+            self.pre_depth += 1
+        elif tag in self.WRAP_TAGS:
+            self.open_tags.append((tag, len(self.out), dict(attrs).get('href')))
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth:
+            return
+
+        if tag in ('main', 'article'):
+            region = self.regions.get(tag)
+            if region and region[1] is None:
+                region[1] = len(self.out)
+        elif tag == 'pre':
+            self.pre_depth = max(0, self.pre_depth - 1)
+        elif tag in self.WRAP_TAGS:
+            for i in range(len(self.open_tags) - 1, -1, -1):
+                if self.open_tags[i][0] == tag:
+                    break
+            else:
+                return
+            _, start, href = self.open_tags[i]
+            del self.open_tags[i:]
+            inner = ''.join(self.out[start:])
+            del self.out[start:]
+            self.out.append(self._wrap(tag, inner, href))
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.out.append(data)
+
+    def _wrap(self, tag, inner, href):
+        if tag in self.HEADING_PREFIX:
+            return f'\n{self.HEADING_PREFIX[tag]} {inner}\n'
+        if tag == 'code':
+            return f'\n```\n{inner}\n```\n' if self.pre_depth else f'`{inner}`'
+        if tag == 'a':
+            return f'[{inner}]({href})' if href is not None else inner
+        if tag == 'li':
+            return f'- {inner}\n'
+        return f'{inner}\n\n'  # p
+
+    def markdown(self):
+        """Return markdown for <main> (else <article>, else the whole page)."""
+        self.close()
+        region = self.regions.get('main') or self.regions.get('article')
+        if region:
+            start, end = region
+            text = ''.join(self.out[start:end])
+        else:
+            text = ''.join(self.out)
+        # Clean up whitespace (blank-line runs and space runs in one pass)
+        text = _RE_WHITESPACE.sub(_whitespace, text)
+        return text.strip()
+
+def markdown_from_response(response):
+    """
+    Convert a streamed (stream=True) response's main content to markdown.
+
+    Decision: Stream the body into the parser instead of read()-ing it whole
+    - Parsing overlaps the download, and the raw page is never held in full
+    - Parsing stops as soon as </main> closes; the rest is drained unparsed
+      so the connection goes back to the session's pool
+    """
+    parser = _MarkdownExtractor()
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in response.iter_content(CHUNK_SIZE):
+        if not parser.done:
+            parser.feed(decoder.decode(chunk))
+    if not parser.done:
+        # Once done, the decoder may hold half a character from a skipped chunk
+        parser.feed(decoder.decode(b'', final=True))
+    return parser.markdown()
+
+def _page_cache_file(path):
+    return PAGE_CACHE_DIR / (hashlib.sha1(path.encode('utf-8')).hexdigest() + '.json')
+
+def load_cached_page(path):
+    """Load a path's cached page entry (None if missing or unreadable)."""
+    try:
+        return json.loads(_page_cache_file(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+def save_cached_page(path, entry):
+    """Persist a page entry; best effort (a failed write just means no cache hit next time)."""
+    try:
+        PAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent runs never read a half-written entry
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=PAGE_CACHE_DIR, delete=False) as f:
+            json.dump(entry, f)
+        os.replace(f.name, _page_cache_file(path))
+    except OSError:
+        pass
 
 def fetch_docs(path):
     """Fetch a documentation page from docs.tempo.xyz"""
@@ -63,36 +203,34 @@ def fetch_docs(path):
     if not path.startswith('/'):
         path = '/' + path
     
-    url = f"https://docs.tempo.xyz{path}"
+    url = f"{BASE_URL}{path}"
+    
+    cached = load_cached_page(path)
+    headers = {}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+    if cached and cached.get('last_modified'):
+        headers['If-Modified-Since'] = cached['last_modified']
     
     try:
-        req = urllib.request.Request(
-            url,
-            headers={'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'}
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            content = response.read().decode('utf-8')
-    except urllib.error.HTTPError as e:
-        print(f"Error: HTTP {e.code} - {e.reason}")
+        with _SESSION.get(url, headers=headers, timeout=30, stream=True) as response:
+            if response.status_code == 304 and cached:  # Unchanged since last fetch
+                return cached['markdown']
+            response.raise_for_status()
+            # Main content (<main>, else <article>) as markdown
+            text = markdown_from_response(response)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+    except requests.HTTPError as e:
+        print(f"Error: HTTP {e.response.status_code} - {e.response.reason}")
         print(f"URL: {url}")
         return None
-    except urllib.error.URLError as e:
-        print(f"Error: Could not connect - {e.reason}")
+    except requests.RequestException as e:
+        print(f"Error: Could not connect - {e}")
         return None
     
-    # Try to extract main content area
-    main_match = re.search(r'<main[^>]*>(.*?)</main>', content, re.DOTALL | re.IGNORECASE)
-    if main_match:
-        content = main_match.group(1)
-    else:
-        # Try article tag
-        article_match = re.search(r'<article[^>]*>(.*?)</article>', content, re.DOTALL | re.IGNORECASE)
-        if article_match:
-            content = article_match.group(1)
-    
-    # Convert to readable text
-    text = strip_html_tags(content)
-    
+    if etag or last_modified:
+        save_cached_page(path, {'etag': etag, 'last_modified': last_modified, 'markdown': text})
     return text
 
 def main():
@@ -120,12 +258,17 @@ def main():
         print("  /sdk/go                        - Go SDK")
         sys.exit(1)
     
-    path = sys.argv[1]
-    content = fetch_docs(path)
+    paths = sys.argv[1:]
+    # Fetch concurrently (round-trips overlap), print in the order given
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(paths))) as executor:
+        pages = list(executor.map(fetch_docs, paths))
     
-    if content:
-        print(f"=== docs.tempo.xyz{path} ===\n")
-        print(content)
+    for i, (path, content) in enumerate(zip(paths, pages)):
+        if content:
+            if i:
+                print()
+            print(f"=== docs.tempo.xyz{path} ===\n")
+            print(content)
 
 if __name__ == "__main__":
     main()
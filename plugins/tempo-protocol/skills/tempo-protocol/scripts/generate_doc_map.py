@@ -5,28 +5,67 @@ Generate a documentation map for Tempo docs by discovering all available paths.
 Usage:
     python3 generate_doc_map.py              # Generate map only
     python3 generate_doc_map.py --recache    # Generate map + cache critical docs
+    python3 generate_doc_map.py --validate   # Also validate sitemap paths
 
 This script:
 1. Discovers documentation structure (sitemap or crawl)
-2. Validates all paths (filters out 404s)
+2. Validates crawled paths (filters out 404s and soft-404 pages)
 3. Generates/updates references/docs-map.md
 4. Optionally caches critical docs for offline use
 """
 
+import io
+import json
 import sys
-import urllib.request
-import urllib.error
+import time
 import xml.etree.ElementTree as ET
 import re
 import html
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import requests
+from requests.adapters import HTTPAdapter
+
+from fetch_docs import markdown_from_response
+
 BASE_URL = "https://docs.tempo.xyz"
 SCRIPT_DIR = Path(__file__).parent
 SKILL_DIR = SCRIPT_DIR.parent
 REFERENCES_DIR = SKILL_DIR / "references"
 
+# Page titles from previous runs: {path: {"title", "etag", "fetched_at"}}
+# Decision: Cache titles on disk, revalidate with ETags after a TTL
+# - Titles rarely change, so reruns shouldn't re-download every page
+# - Within the TTL no request is made; after it, If-None-Match turns most
+#   fetches into header-only 304s
+TITLE_CACHE_PATH = REFERENCES_DIR / ".title_cache.json"
+TITLE_CACHE_TTL = 7 * 24 * 60 * 60  # seconds
+
+# Concurrent HTTP requests (network-bound, so threads overlap round-trips)
+MAX_WORKERS = 32
+
+# Stop crawling once this many paths are discovered (fallback when there's no sitemap)
+MAX_CRAWL_PATHS = 100
+
+_HEADERS = {'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'}
+
+# One keep-alive connection pool shared by every request (and worker thread)
+# so repeated requests to docs.tempo.xyz skip the TCP + TLS handshake.
+# Default headers are set once here instead of on every call.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
+_SESSION.headers.update(_HEADERS)
+
+# Regexes compiled once at import (used for every fetched page)
+_FLAGS = re.DOTALL | re.IGNORECASE
+_RE_HREF = re.compile(r'href=["\']([^"\']*)["\']')
+_RE_TITLE = re.compile(r'<title[^>]*>(.*?)</title>', _FLAGS)
+_RE_TITLE_SUFFIX = re.compile(r'\s*\|\s*Tempo.*$')
+_RE_H1 = re.compile(r'<h1[^>]*>(.*?)</h1>', _FLAGS)
+_RE_TAG = re.compile(r'<[^>]+>')
+
 # Critical docs to cache for offline use
 CRITICAL_DOCS = [
     "/protocol/tip20/overview",
@@ -42,23 +81,17 @@ def fetch_sitemap():
     sitemap_url = f"{BASE_URL}/sitemap.xml"
 
     try:
-        req = urllib.request.Request(
-            sitemap_url,
-            headers={'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'}
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            content = response.read().decode('utf-8')
-
-        # Parse XML
-        root = ET.fromstring(content)
+        response = _SESSION.get(sitemap_url, timeout=30)
+        response.raise_for_status()
 
+        # Stream-parse the raw bytes (no decode, no full DOM)
         # Extract all <loc> URLs
-        # Handle both with and without namespace
+        # Handle both with and without namespace ("{ns}loc" or "loc")
         locs = []
-        for loc in root.findall('.//{http://www.sitemaps.org/schemas/sitemap/0.9}loc'):
-            locs.append(loc.text)
-        for loc in root.findall('.//loc'):  # Fallback without namespace
-            locs.append(loc.text)
+        for _, elem in ET.iterparse(io.BytesIO(response.content), events=('end',)):
+            if elem.tag == 'loc' or elem.tag.endswith('}loc'):
+                locs.append((elem.text or '').strip())
+            elem.clear()
 
         # Extract paths from URLs
         paths = []
@@ -81,7 +114,7 @@ def crawl_docs():
     to_visit = ['/']
     visited = set()
 
-    while to_visit and len(discovered) < 100:  # Limit to prevent infinite loops
+    while to_visit and len(discovered) < MAX_CRAWL_PATHS:  # Limit to prevent infinite loops
         path = to_visit.pop(0)
         if path in visited:
             continue
@@ -89,16 +122,13 @@ def crawl_docs():
 
         url = f"{BASE_URL}{path}"
         try:
-            req = urllib.request.Request(
-                url,
-                headers={'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'}
-            )
-            with urllib.request.urlopen(req, timeout=30) as response:
-                content = response.read().decode('utf-8')
-
-            # Find all internal links
-            links = re.findall(r'href=["\']([^"\']*)["\']', content)
-            for link in links:
+            response = _SESSION.get(url, timeout=30)
+            response.raise_for_status()
+            content = response.content.decode('utf-8')
+
+            # Find internal links, streaming matches and stopping at the crawl limit
+            for match in _RE_HREF.finditer(content):
+                link = match.group(1)
                 # Only internal docs links
                 if link.startswith('/') and not link.startswith('//'):
                     # Remove anchors and query params
@@ -106,66 +136,131 @@ def crawl_docs():
                     if clean_link and clean_link != '/' and clean_link not in visited:
                         discovered.add(clean_link)
                         to_visit.append(clean_link)
+                        if len(discovered) >= MAX_CRAWL_PATHS:
+                            break
         except Exception as e:
             print(f"Could not crawl {path}: {e}")
 
     return list(discovered)
 
 
-def validate_path(path):
-    """Check if a path exists (200 OK)."""
+def _fingerprint(response):
+    """
+    (Content-Length, ETag) of a response, or None without an ETag.
+
+    Content-Length alone can't tell pages apart (two unrelated pages can share
+    a length), so a probe without an ETag disables soft-404 filtering.
+    """
+    etag = response.headers.get('ETag')
+    if not etag:
+        return None
+    return (response.headers.get('Content-Length'), etag)
+
+
+def detect_soft_404():
+    """
+    Fingerprint the page served for a path that can't exist.
+
+    Decision: Detect soft 404s once, up front
+    - Some doc hosts answer unknown paths with 200 and a generic "not found" page
+    - That page has the same Content-Length/ETag for every missing path, so one
+      probe lets validate_path reject them from the HEAD response alone
+    Returns None when missing paths get a real 404 (no filtering needed).
+    """
+    try:
+        response = _SESSION.head(f"{BASE_URL}/__nonexistent__", timeout=10, allow_redirects=True)
+    except Exception:
+        return None
+    if response.status_code != 200:
+        return None
+    return _fingerprint(response)
+
+
+def validate_path(path, soft_404=None):
+    """
+    Check if a path exists (200 OK that isn't the soft-404 page `soft_404`).
+
+    Returns True/False, or None for a 200 whose fingerprint matches `soft_404`
+    (validate_paths decides whether to trust that match).
+    """
     url = f"{BASE_URL}{path}"
     try:
-        req = urllib.request.Request(
+        response = _SESSION.head(  # HEAD request for efficiency
             url,
-            headers={'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'}
+            timeout=10,
+            allow_redirects=True
         )
-        req.get_method = lambda: 'HEAD'  # HEAD request for efficiency
-        with urllib.request.urlopen(req, timeout=10) as response:
-            return response.code == 200
-    except urllib.error.HTTPError as e:
-        if e.code == 405:  # Method not allowed, try GET
-            try:
-                req = urllib.request.Request(
-                    url,
-                    headers={'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'}
-                )
-                with urllib.request.urlopen(req, timeout=10) as response:
-                    return response.code == 200
-            except:
-                return False
-        return False
+        if response.status_code == 200 and soft_404 is not None:
+            return None if _fingerprint(response) == soft_404 else True
+        if response.status_code == 405:  # Method not allowed, try GET for the first byte only
+            with _SESSION.get(
+                url,
+                headers={'Range': 'bytes=0-0'},
+                timeout=10,
+                stream=True
+            ) as response:
+                return response.status_code in (200, 206)
+        return response.status_code == 200
     except:
         return False
 
 
-def fetch_page_title(path):
-    """Fetch a page and extract its title."""
+def load_title_cache():
+    """Load cached page titles (empty if missing or unreadable)."""
+    try:
+        return json.loads(TITLE_CACHE_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_title_cache(cache):
+    """Persist page titles for the next run."""
+    TITLE_CACHE_PATH.write_text(json.dumps(cache, indent=2, sort_keys=True), encoding='utf-8')
+
+
+def extract_title(content):
+    """Extract a page title from HTML (h1, else <title>)."""
+    h1_match = _RE_H1.search(content)
+    if h1_match:
+        title = _RE_TAG.sub('', h1_match.group(1))
+        return html.unescape(title.strip())
+
+    title_match = _RE_TITLE.search(content)
+    if title_match:
+        title = html.unescape(title_match.group(1).strip())
+        # Remove common suffixes
+        title = _RE_TITLE_SUFFIX.sub('', title)
+        return title.strip()
+
+    return "Documentation"
+
+
+def fetch_page_title(path, cached=None):
+    """
+    Fetch a page and extract its title.
+
+    `cached` is this path's entry from the title cache, if any. Returns
+    (title, cache entry). When the fetch fails, a stale cached entry is kept
+    (and retried next run); without one the entry is None.
+    """
+    now = time.time()
+    if cached and now - cached.get('fetched_at', 0) < TITLE_CACHE_TTL:
+        return cached['title'], cached
+
     url = f"{BASE_URL}{path}"
+    headers = {'If-None-Match': cached['etag']} if cached and cached.get('etag') else None
+
     try:
-        req = urllib.request.Request(
-            url,
-            headers={'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'}
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            content = response.read().decode('utf-8')
-
-        # Try to find h1 or title
-        h1_match = re.search(r'<h1[^>]*>(.*?)</h1>', content, re.DOTALL | re.IGNORECASE)
-        if h1_match:
-            title = re.sub(r'<[^>]+>', '', h1_match.group(1))
-            return html.unescape(title.strip())
-
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', content, re.DOTALL | re.IGNORECASE)
-        if title_match:
-            title = html.unescape(title_match.group(1).strip())
-            # Remove common suffixes
-            title = re.sub(r'\s*\|\s*Tempo.*$', '', title)
-            return title.strip()
-
-        return "Documentation"
+        response = _SESSION.get(url, headers=headers, timeout=30)
+        if response.status_code == 304:  # Unchanged since last run
+            return cached['title'], {**cached, 'fetched_at': now}
+        response.raise_for_status()
+        title = extract_title(response.content.decode('utf-8'))
+        return title, {'title': title, 'etag': response.headers.get('ETag'), 'fetched_at': now}
     except:
-        return "Documentation"
+        if cached:
+            return cached['title'], cached
+        return "Documentation", None
 
 
 def categorize_paths(paths):
@@ -211,6 +306,17 @@ def generate_docs_map_content(categorized_paths):
         'other': 'Other Resources'
     }
 
+    # Fetch all page titles concurrently up front (reusing cached titles)
+    all_paths = [path for paths in categorized_paths.values() for path in paths]
+    title_cache = load_title_cache()
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(lambda path: fetch_page_title(path, title_cache.get(path)), all_paths)
+        fetched = dict(zip(all_paths, results))
+
+    titles = {path: title for path, (title, _) in fetched.items()}
+    # Rewrite the cache with current paths only (drops removed pages and failed fetches)
+    save_title_cache({path: entry for path, (_, entry) in fetched.items() if entry})
+
     for category, title in category_titles.items():
         paths = categorized_paths.get(category, [])
         if not paths:
@@ -222,7 +328,7 @@ def generate_docs_map_content(categorized_paths):
         content.append("|------|-------------|")
 
         for path in sorted(paths):
-            desc = fetch_page_title(path)
+            desc = titles[path]
             content.append(f"| `{path}` | {desc} |")
 
         content.append("")
@@ -242,87 +348,74 @@ def generate_docs_map_content(categorized_paths):
     return '\n'.join(content)
 
 
-def strip_html_tags(text):
-    """Remove HTML tags and decode entities."""
-    # Remove script and style elements
-    text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    # Remove navigation elements
-    text = re.sub(r'<nav[^>]*>.*?</nav>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<header[^>]*>.*?</header>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<footer[^>]*>.*?</footer>', '', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert headers to markdown
-    text = re.sub(r'<h1[^>]*>(.*?)</h1>', r'\n# \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<h2[^>]*>(.*?)</h2>', r'\n## \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<h3[^>]*>(.*?)</h3>', r'\n### \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<h4[^>]*>(.*?)</h4>', r'\n#### \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert code blocks
-    text = re.sub(r'<pre[^>]*><code[^>]*>(.*?)</code></pre>', r'\n```\n\1\n```\n', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'<code[^>]*>(.*?)</code>', r'`\1`', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert links
-    text = re.sub(r'<a[^>]*href="([^"]*)"[^>]*>(.*?)</a>', r'[\2](\1)', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert lists
-    text = re.sub(r'<li[^>]*>(.*?)</li>', r'- \1\n', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert paragraphs
-    text = re.sub(r'<p[^>]*>(.*?)</p>', r'\1\n\n', text, flags=re.DOTALL | re.IGNORECASE)
-    # Convert line breaks
-    text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
-    # Remove remaining HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    # Decode HTML entities
-    text = html.unescape(text)
-    # Clean up whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = re.sub(r' +', ' ', text)
-    return text.strip()
-
-
 def cache_doc(path):
     """Fetch and cache a documentation page."""
     url = f"{BASE_URL}{path}"
 
     try:
-        req = urllib.request.Request(
-            url,
-            headers={'User-Agent': 'Mozilla/5.0 (compatible; TempoDocs/1.0)'}
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            content = response.read().decode('utf-8')
+        # Stream straight into the markdown converter (no full-page bytes/str copies)
+        with _SESSION.get(url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            text = markdown_from_response(response)
     except Exception as e:
         print(f"  Error fetching {path}: {e}")
         return False
 
-    # Extract main content
-    main_match = re.search(r'<main[^>]*>(.*?)</main>', content, re.DOTALL | re.IGNORECASE)
-    if main_match:
-        content = main_match.group(1)
-    else:
-        article_match = re.search(r'<article[^>]*>(.*?)</article>', content, re.DOTALL | re.IGNORECASE)
-        if article_match:
-            content = article_match.group(1)
-
-    # Convert to markdown
-    text = strip_html_tags(content)
-
     # Generate filename
     filename = path.strip('/').replace('/', '-') + '.md'
     filepath = REFERENCES_DIR / filename
 
-    # Write to file
-    with open(filepath, 'w') as f:
-        f.write(f"# {path}\n\n")
-        f.write(f"Source: {url}\n\n")
-        f.write("---\n\n")
-        f.write(text)
+    # Write to file (one buffer, one write; no newline translation)
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        f.write(f"# {path}\n\nSource: {url}\n\n---\n\n{text}")
 
     print(f"  Cached: {filepath.name}")
     return True
 
 
+def validate_paths(paths):
+    """Validate paths concurrently, printing progress; returns the valid ones."""
+    valid_paths = []
+    soft_404_paths = []
+    invalid_count = 0
+
+    soft_404 = detect_soft_404()
+    if soft_404:
+        print("  Missing pages return 200; filtering them by fingerprint")
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(lambda path: validate_path(path, soft_404), paths)
+        for i, (path, valid) in enumerate(zip(paths, results), 1):
+            if i % 10 == 0:
+                print(f"  Checked {i}/{len(paths)}...")
+
+            if valid:
+                valid_paths.append(path)
+            elif valid is None:
+                soft_404_paths.append(path)
+            else:
+                invalid_count += 1
+
+    if soft_404_paths and not valid_paths:
+        # Every page that loaded looks like the not-found page: more likely an
+        # SPA shell served for all paths than a site with no pages at all
+        print("  ⚠ Every page matched the soft-404 fingerprint; keeping them unfiltered")
+        valid_paths = soft_404_paths
+    else:
+        invalid_count += len(soft_404_paths)
+
+    print(f"  ✓ {len(valid_paths)} valid paths")
+    if invalid_count > 0:
+        print(f"  ⚠ {invalid_count} invalid paths (404s) filtered out")
+
+    return valid_paths
+
+
 def main():
     import sys
 
     recache = '--recache' in sys.argv
+    force_validate = '--validate' in sys.argv
 
     print("=" * 60)
     print("Tempo Documentation Map Generator")
@@ -332,8 +425,9 @@ def main():
     # Step 1: Discover documentation structure
     print("Step 1: Discovering documentation structure...")
     paths = fetch_sitemap()
+    from_sitemap = bool(paths)
 
-    if paths:
+    if from_sitemap:
         print(f"  ✓ Found {len(paths)} paths from sitemap.xml")
     else:
         print("  ⚠ No sitemap found, crawling from homepage...")
@@ -347,22 +441,16 @@ def main():
     print()
 
     # Step 2: Validate paths
-    print("Step 2: Validating paths...")
-    valid_paths = []
-    invalid_count = 0
-
-    for i, path in enumerate(paths, 1):
-        if i % 10 == 0:
-            print(f"  Checked {i}/{len(paths)}...")
-
-        if validate_path(path):
-            valid_paths.append(path)
-        else:
-            invalid_count += 1
-
-    print(f"  ✓ {len(valid_paths)} valid paths")
-    if invalid_count > 0:
-        print(f"  ⚠ {invalid_count} invalid paths (404s) filtered out")
+    # Decision: Trust the sitemap
+    # - The site generator lists only pages it built, so probing each one is
+    #   a wasted round-trip per path
+    # - Crawled hrefs can point anywhere and still need validation
+    if from_sitemap and not force_validate:
+        print("Step 2: Skipping validation (paths come from sitemap.xml; use --validate to check)")
+        valid_paths = paths
+    else:
+        print("Step 2: Validating paths...")
+        valid_paths = validate_paths(paths)
     print()
 
     # Step 3: Generate docs map
@@ -381,11 +469,14 @@ def main():
     # Step 4: Cache critical docs (optional)
     if recache:
         print("Step 4: Caching critical documentation...")
+        to_cache = []
         for path in CRITICAL_DOCS:
             if path in valid_paths:
-                cache_doc(path)
+                to_cache.append(path)
             else:
                 print(f"  ⚠ Skipping {path} (not found in valid paths)")
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            list(executor.map(cache_doc, to_cache))
         print()
 
     print("=" * 60)
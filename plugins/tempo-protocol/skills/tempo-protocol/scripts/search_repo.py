@@ -2,6 +2,8 @@
 """
 Search tempoxyz/tempo docs/pages by downloading the repo as a zip and grepping locally.
 
+The zipball is cached under ~/.cache/repo_search and reused while the ref's commit is unchanged.
+
 Examples:
   python search_repo.py "transaction spec"
   python search_repo.py "TempoTransaction" --regex --ignore-case
@@ -13,24 +15,29 @@ from __future__ import annotations
 
 import argparse
 import fnmatch
+import functools
+import io
+import itertools
 import os
+import posixpath
 import re
 import sys
 import tempfile
 import zipfile
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Iterator, Optional, Sequence, Tuple
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import requests
 
+# Zipballs cached per repo, keyed by ref and validated against the ref's commit SHA
+CACHE_DIR = Path.home() / ".cache" / "repo_search"
+
 
-@dataclass(frozen=True)
-class Match:
-    file: Path
-    line_no: int
-    col: int
-    line: str
+# A match as (line_no, lines, span): 1-based line number, every line of the
+# file (one list shared by all of its matches), and the match's [start, end)
+# columns on that line. Plain tuples: a frozen dataclass per match cost an
+# extra object and a slow object.__setattr__ __init__ on every hit
+Hit = Tuple[int, List[str], Tuple[int, int]]
 
 
 def parse_args(argv: Sequence[str]) -> argparse.Namespace:
@@ -50,6 +57,7 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
     p.add_argument("--max-matches", type=int, default=0, help="Stop after N matches (0 = unlimited)")
     p.add_argument("--timeout", type=float, default=60.0, help="HTTP timeout seconds (default: 60)")
     p.add_argument("--no-color", action="store_true", help="Disable ANSI color")
+    p.add_argument("--no-cache", action="store_true", help="Always download the zipball (skip the local cache)")
     return p.parse_args(argv)
 
 
@@ -64,74 +72,167 @@ def github_headers() -> dict:
     return headers
 
 
-def download_repo_zip(repo: str, ref: str, timeout: float) -> Path:
+def resolve_sha(repo: str, ref: str, timeout: float) -> Optional[str]:
+    """Resolve a ref to its commit SHA (a ~40 byte response); None if the lookup fails."""
+    url = f"https://api.github.com/repos/{repo}/commits/{ref}"
+    headers = {**github_headers(), "Accept": "application/vnd.github.sha"}
+    try:
+        r = requests.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        return None
+    sha = r.text.strip()
+    return sha if r.status_code == 200 and sha else None
+
+
+def download_repo_zip(repo: str, ref: str, timeout: float) -> io.BytesIO:
+    """
+    Download the zipball into memory.
+
+    Decision: Buffer in memory, not a temp file
+    - Docs zipballs are a few MB; a disk round-trip buys nothing
+    - The whole body is needed regardless: a zip's central directory sits at
+      the end, so no member can be read (and no early --max-matches abort
+      is possible) before the download completes
+    """
     url = f"https://api.github.com/repos/{repo}/zipball/{ref}"
     with requests.get(url, headers=github_headers(), stream=True, timeout=timeout) as r:
         if r.status_code >= 400:
             msg = r.text.strip()[:2000]
             raise RuntimeError(f"GitHub download failed: HTTP {r.status_code}\n{msg}")
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".zip")
-        try:
-            for chunk in r.iter_content(chunk_size=1024 * 1024):
-                if chunk:
-                    tmp.write(chunk)
-            tmp.flush()
-            return Path(tmp.name)
-        finally:
-            tmp.close()
-
-
-def extract_zip(zip_path: Path) -> Path:
-    out_dir = Path(tempfile.mkdtemp(prefix="repo_search_"))
-    with zipfile.ZipFile(zip_path) as z:
-        z.extractall(out_dir)
-
-    # GitHub zipball contains a single top-level folder like owner-repo-sha/
-    children = [p for p in out_dir.iterdir() if p.is_dir()]
-    if len(children) == 1:
-        return children[0]
-    return out_dir
-
-
-def iter_files(root: Path, rel_path: str, include_globs: Sequence[str]) -> Iterator[Path]:
-    base = root / rel_path
-    if not base.exists():
-        raise FileNotFoundError(f"Path not found in repo: {rel_path}")
-
-    for p in base.rglob("*"):
-        if not p.is_file():
-            continue
-        name = p.name
-        if include_globs != ["*"] and not any(fnmatch.fnmatch(name, g) for g in include_globs):
-            continue
-        yield p
-
-
-def build_matcher(query: str, regex: bool, ignore_case: bool):
-    if regex:
-        flags = re.MULTILINE
-        if ignore_case:
-            flags |= re.IGNORECASE
-        rx = re.compile(query, flags)
-
-        def find_in_line(line: str) -> Optional[Tuple[int, int]]:
-            m = rx.search(line)
-            if not m:
-                return None
-            return (m.start(), m.end())
-
-        return find_in_line
-    else:
-        needle = query.lower() if ignore_case else query
+        buf = io.BytesIO()
+        for chunk in r.iter_content(chunk_size=1024 * 1024):
+            if chunk:
+                buf.write(chunk)
+    buf.seek(0)
+    return buf
+
 
-        def find_in_line(line: str) -> Optional[Tuple[int, int]]:
-            hay = line.lower() if ignore_case else line
-            idx = hay.find(needle)
-            if idx == -1:
-                return None
-            return (idx, idx + len(needle))
+def _cache_paths(repo: str, ref: str) -> Tuple[Path, Path]:
+    base = CACHE_DIR / repo.replace("/", "_")
+    name = ref.replace("/", "_")
+    return base / f"{name}.sha", base / f"{name}.zip"
 
-        return find_in_line
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    # Write then rename so concurrent runs never read a half-written file
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+
+
+def load_repo_zip(repo: str, ref: str, timeout: float, use_cache: bool = True) -> Union[Path, BinaryIO]:
+    """
+    Return the zipball for repo@ref, from the local cache when the ref hasn't moved.
+
+    Decision: Validate the cache with the commits API
+    - One tiny SHA lookup replaces a multi-MB zipball download on repeat searches
+    - The zipball is then fetched by SHA, so the cached zip always matches the SHA stored with it
+    - Cache writes are best effort; a failure only costs a download next time
+    """
+    if not use_cache:
+        return download_repo_zip(repo, ref, timeout)
+
+    sha = resolve_sha(repo, ref, timeout)
+    if sha is None:
+        return download_repo_zip(repo, ref, timeout)
+
+    sha_file, zip_file = _cache_paths(repo, ref)
+    try:
+        if sha_file.read_text().strip() == sha and zip_file.is_file():
+            return zip_file
+    except OSError:
+        pass
+
+    buf = download_repo_zip(repo, sha, timeout)
+    try:
+        zip_file.parent.mkdir(parents=True, exist_ok=True)
+        # Zip first: a SHA on disk must never point at a stale zip
+        _write_atomic(zip_file, buf.getvalue())
+        _write_atomic(sha_file, sha.encode())
+    except OSError:
+        pass
+    return buf
+
+
+def compile_globs(include_globs: Sequence[str]) -> Optional[re.Pattern]:
+    """
+    Fold all --include globs into one regex over file names (None = include everything).
+
+    Decision: One precompiled alternation instead of fnmatch per glob per file
+    - fnmatch.fnmatch re-normalizes and looks up its pattern cache on every call
+    - A single match() tests every glob at once
+    """
+    if include_globs == ["*"]:
+        return None
+    return re.compile("|".join(fnmatch.translate(os.path.normcase(g)) for g in include_globs))
+
+
+def _wanted(inner: str, prefix: str, name_rx: Optional[re.Pattern]) -> bool:
+    """True if a repo-relative zip member is a file we will search."""
+    if not inner.startswith(prefix) or inner.endswith("/"):
+        return False
+    return name_rx is None or name_rx.match(os.path.normcase(inner.rsplit("/", 1)[-1])) is not None
+
+
+def literal_prefilter(query: str, regex: bool, ignore_case: bool) -> Optional[bytes]:
+    """
+    Bytes every matching file must contain, or None if the query can't be checked that way.
+
+    Decision: Reject files on raw bytes before decoding them
+    - Most files don't contain the query; bytes.find skips the UTF-8 decode for them
+    - Only sound for case-sensitive literals: case folding (e.g. the Kelvin sign
+      lowering to "k") and regexes don't map onto bytes, and U+FFFD in the query
+      could come from undecodable bytes
+    """
+    if regex or ignore_case or "\ufffd" in query:
+        return None
+    return query.encode("utf-8")
+
+
+def iter_zip_text(
+    zip_file: Union[Path, BinaryIO],
+    rel_path: str,
+    include_globs: Sequence[str],
+    prefilter: Optional[bytes] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (repo-relative name, decoded text) for each searched file, straight from the zip.
+
+    Files whose bytes don't contain prefilter (see literal_prefilter) are skipped undecoded.
+
+    Decision: Search the zipball in place instead of extracting it
+    - Each file's text is only needed once, so writing it to a temp dir and
+      reading it back is pure overhead
+    - No extraction directory to clean up afterwards
+    """
+    # "", ".", "./docs/pages/" etc.; "." (the repo root) matches every member
+    norm = posixpath.normpath(rel_path).strip("/")
+    prefix = "" if norm in ("", ".") else norm + "/"
+    name_rx = compile_globs(include_globs)
+    with zipfile.ZipFile(zip_file) as z:
+        infos = z.infolist()
+        # GitHub zipball contains a single top-level folder like owner-repo-sha/
+        inner_names = [i.filename.partition("/")[2] for i in infos]
+        if not any(n.startswith(prefix) for n in inner_names):
+            raise FileNotFoundError(f"Path not found in repo: {rel_path}")
+
+        for info, inner in zip(infos, inner_names):
+            if not _wanted(inner, prefix, name_rx):
+                continue
+            try:
+                data = z.read(info)
+            except Exception:
+                continue
+            if prefilter is not None and prefilter not in data:
+                continue
+            yield inner, data.decode("utf-8", errors="replace")
+
+
+def compile_regex(query: str, ignore_case: bool) -> re.Pattern:
+    flags = re.MULTILINE
+    if ignore_case:
+        flags |= re.IGNORECASE
+    return re.compile(query, flags)
 
 
 def colorize(s: str, code: str, enabled: bool) -> str:
@@ -140,37 +241,120 @@ def colorize(s: str, code: str, enabled: bool) -> str:
     return f"\x1b[{code}m{s}\x1b[0m"
 
 
-def search_file(path: Path, find_in_line, max_matches: int) -> Iterator[Match]:
-    try:
-        text = path.read_text(encoding="utf-8", errors="replace")
-    except Exception:
-        return
+def _iter_line_hits(text: str, rx: re.Pattern) -> Iterator[Hit]:
+    # Line-sensitive regexes only; the compiled pattern is called directly, no wrapper
+    lines = text.splitlines()
+    search = rx.search
+    for i, line in enumerate(lines, start=1):
+        m = search(line)
+        if m:
+            yield i, lines, m.span()
+
+
+# String anchors and lookarounds can see past a line's end when matched against the whole text
+_RE_LINE_SENSITIVE = re.compile(r"\\[AZz]|\(\?<?[=!]")
+
+
+def can_scan_whole_text(query: str) -> bool:
+    """True if a regex query finds the same lines scanned whole-text as line by line."""
+    return not _RE_LINE_SENSITIVE.search(query)
 
-    for i, line in enumerate(text.splitlines(), start=1):
-        span = find_in_line(line)
-        if not span:
-            continue
-        col = span[0] + 1
-        yield Match(file=path, line_no=i, col=col, line=line)
-        if max_matches and max_matches <= 1:
+
+def _iter_regex_hits(text: str, rx: re.Pattern) -> Iterator[Hit]:
+    """
+    Yield (line_no, lines, span) for each line matching rx, scanning the whole text at once.
+
+    Decision: Let sre find candidate lines instead of looping over every line
+    - rx.search over the whole buffer skips non-matching stretches in C
+    - Line numbers come from counting newlines between hits, also in C
+    - Each candidate line is re-checked on its own, so results keep per-line
+      semantics: one hit per line, and a match that only exists across a
+      newline doesn't count
+    """
+    lines = text.splitlines()
+    if not lines:
+        return
+    # Rejoin on "\n" alone so ^/$ see every splitlines() boundary (\r\n, \r, \u2028, ...)
+    norm = "\n".join(lines)
+    line_no, counted = 1, 0
+    m = rx.search(norm)
+    while m is not None:
+        start = m.start()
+        line_no += norm.count("\n", counted, start)
+        counted = start
+        line = lines[line_no - 1]
+        lm = rx.search(line)
+        if lm:
+            yield line_no, lines, (lm.start(), lm.end())
+        # Resume at the next line even if this candidate spanned several
+        end = norm.find("\n", start)
+        if end == -1:
+            return
+        m = rx.search(norm, end + 1)
+
+
+def _iter_literal_hits(text: str, needle: str, ignore_case: bool) -> Iterator[Hit]:
+    """
+    Yield (line_no, lines, span) for each line containing needle, scanning the whole text at once.
+
+    Decision: One str.find pass over the file, not a lowered copy of every line
+    - Lowercasing the text once replaces a per-line .lower() allocation
+    - Files without a hit are rejected by one substring test
+    - str.find skips straight to the next hit in C; only hit lines touch Python
+    - A re2/Hyperscan DFA would add a native dependency for a single literal
+      needle, where str.find is already a vectorized two-way search
+    """
+    if needle and needle.splitlines() != [needle]:
+        return  # a line break in the needle can never match within a line
+    hay = text.lower() if ignore_case else text
+    if needle not in hay:
+        return  # most files: no line splitting at all
+    lines = text.splitlines()
+    if not lines:
+        return
+    # Rejoin on "\n" alone so offsets map onto splitlines() lines
+    hay = "\n".join(hay.splitlines() if ignore_case else lines)
+    line_no, counted = 1, 0
+    idx = hay.find(needle)
+    while idx != -1:
+        line_no += hay.count("\n", counted, idx)
+        counted = idx
+        col = idx - (hay.rfind("\n", 0, idx) + 1)
+        yield line_no, lines, (col, col + len(needle))
+        end = hay.find("\n", idx)
+        if end == -1:
             return
-        if max_matches:
-            max_matches -= 1
+        idx = hay.find(needle, end + 1)
+
+
+def build_scanner(query: str, regex: bool, ignore_case: bool):
+    """Return a function mapping a file's text to its (line_no, lines, span) hits."""
+    if not regex:
+        needle = query.lower() if ignore_case else query
+        return functools.partial(_iter_literal_hits, needle=needle, ignore_case=ignore_case)
+    rx = compile_regex(query, ignore_case)
+    if can_scan_whole_text(query):
+        return functools.partial(_iter_regex_hits, rx=rx)
+    return functools.partial(_iter_line_hits, rx=rx)
+
+
+def search_file(text: str, scan, max_matches: int) -> Iterator[Hit]:
+    hits = scan(text)
+    return itertools.islice(hits, max_matches) if max_matches else hits
 
 
 def print_match_with_context(
-    match: Match,
-    root: Path,
+    name: str,
+    hit: Hit,
     context: int,
-    find_in_line,
     color: bool,
 ) -> None:
-    rel = match.file.relative_to(root)
-    header = f"{rel}:{match.line_no}:{match.col}"
-    print(colorize(header, "36", color))
+    line_no, lines, (a, b) = hit
+    header = f"{name}:{line_no}:{a + 1}"
+    # Build the whole block and write it once, not one print() (two writes) per line
+    out = [colorize(header, "36", color), "\n"]
 
-    lines = match.file.read_text(encoding="utf-8", errors="replace").splitlines()
-    i = match.line_no - 1
+    i = line_no - 1
     lo = max(0, i - context)
     hi = min(len(lines), i + context + 1)
 
@@ -181,17 +365,15 @@ def print_match_with_context(
 
         # highlight first occurrence on the matching line
         if j == i:
-            span = find_in_line(line)
-            if span:
-                a, b = span
-                line = (
-                    line[:a]
-                    + colorize(line[a:b], "31", color)  # red
-                    + line[b:]
-                )
+            line = (
+                line[:a]
+                + colorize(line[a:b], "31", color)  # red
+                + line[b:]
+            )
 
-        print(f" {prefix} {ln} | {line}")
-    print()
+        out.append(f" {prefix} {ln} | {line}\n")
+    out.append("\n")
+    sys.stdout.write("".join(out))
 
 
 def main(argv: Sequence[str]) -> int:
@@ -203,21 +385,19 @@ def main(argv: Sequence[str]) -> int:
 
     use_color = (not args.no_color) and sys.stdout.isatty()
 
-    zip_path = None
     try:
-        zip_path = download_repo_zip(args.repo, args.ref, args.timeout)
-        repo_root = extract_zip(zip_path)
-
-        find_in_line = build_matcher(args.query, args.regex, args.ignore_case)
+        zip_file = load_repo_zip(args.repo, args.ref, args.timeout, use_cache=not args.no_cache)
+        scan = build_scanner(args.query, args.regex, args.ignore_case)
 
         total = 0
-        for f in iter_files(repo_root, args.path, include_globs):
+        prefilter = literal_prefilter(args.query, args.regex, args.ignore_case)
+        for name, text in iter_zip_text(zip_file, args.path, include_globs, prefilter):
             remaining = 0 if args.max_matches == 0 else (args.max_matches - total)
             if args.max_matches and remaining <= 0:
                 break
 
-            for m in search_file(f, find_in_line, remaining if args.max_matches else 0):
-                print_match_with_context(m, repo_root, args.context, find_in_line, use_color)
+            for hit in search_file(text, scan, remaining if args.max_matches else 0):
+                print_match_with_context(name, hit, args.context, use_color)
                 total += 1
                 if args.max_matches and total >= args.max_matches:
                     break
@@ -235,12 +415,6 @@ def main(argv: Sequence[str]) -> int:
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 2
-    finally:
-        if zip_path and zip_path.exists():
-            try:
-                zip_path.unlink()
-            except Exception:
-                pass
 
 
 if __name__ == "__main__":
@@ -19,13 +19,31 @@ import {
 } from './skills/twitter-research/scripts/twitter/service'
 import type { SearchOptions, TwitterTweet } from './skills/twitter-research/scripts/twitter/types'
 import { encodeToon } from './skills/twitter-research/scripts/twitter/toon'
+import { setCacheTtl } from './skills/twitter-research/scripts/twitter/client'
 
-/** Flatten array fields to strings so tweets stay tabular in TOON. */
+/**
+ * Flatten array fields to strings so tweets stay tabular in TOON.
+ * Fields are listed explicitly (same column order as before) rather than
+ * copied via rest/spread, which enumerates every key of every tweet.
+ */
 function flattenTweets(tweets: TwitterTweet[]) {
-  return tweets.map(({ mediaUrls, urls, ...rest }) => ({
-    ...rest,
-    mediaUrls: mediaUrls.join('|'),
-    urls: urls.map(u => u.expanded).join('|'),
+  return tweets.map((t) => ({
+    id: t.id,
+    url: t.url,
+    text: t.text,
+    createdAt: t.createdAt,
+    username: t.username,
+    displayName: t.displayName,
+    authorFollowersCount: t.authorFollowersCount,
+    likeCount: t.likeCount,
+    retweetCount: t.retweetCount,
+    replyCount: t.replyCount,
+    viewCount: t.viewCount,
+    isRetweet: t.isRetweet,
+    isReply: t.isReply,
+    isQuote: t.isQuote,
+    mediaUrls: t.mediaUrls.join('|'),
+    urls: t.urls.map(u => u.expanded).join('|'),
   }))
 }
 
@@ -356,7 +374,21 @@ server.tool(
   }
 )
 
+/**
+ * Response caching is off by default here: a long-running server would otherwise
+ * keep answering with results up to the CLI's default TTL old. Opt in with
+ * TWITTER_CACHE_TTL=<seconds> in the server's env.
+ */
+function configureCache() {
+  const ttl = Number(process.env.TWITTER_CACHE_TTL ?? 0)
+  if (!Number.isFinite(ttl) || ttl < 0) {
+    throw new Error('TWITTER_CACHE_TTL must be a non-negative number of seconds')
+  }
+  setCacheTtl(ttl)
+}
+
 async function main() {
+  configureCache()
   const transport = new StdioServerTransport()
   await server.connect(transport)
 }
@@ -1,10 +1,82 @@
+import { createHash } from 'node:crypto'
+import { mkdir, readdir, readFile, stat, unlink, writeFile } from 'node:fs/promises'
+import { join } from 'node:path'
 import type { TwitterUser, TwitterTweet, TwitterCommunity, TweetUrl, PaginatedResult } from './types'
 
 const RAPIDAPI_HOST = 'twitter241.p.rapidapi.com'
 const RAPIDAPI_URL = `https://${RAPIDAPI_HOST}`
 
+// Response cache: repeated research queries skip the API for a few minutes
+const CACHE_DIR = join(import.meta.dir, '.cache')
+export const DEFAULT_CACHE_TTL = 300
+let cacheTtlMs = DEFAULT_CACHE_TTL * 1000
+let lastPruneMs = 0
+
+/** Set the response cache TTL in seconds (0 disables the cache). */
+export function setCacheTtl(seconds: number): void {
+  cacheTtlMs = Math.max(0, seconds) * 1000
+}
+
+function cachePath(url: string): string {
+  return join(CACHE_DIR, createHash('sha1').update(url).digest('hex') + '.json')
+}
+
+/** Return the cached response if it is younger than the TTL; misses and unreadable entries return undefined. */
+async function readCache(path: string): Promise<unknown> {
+  try {
+    const info = await stat(path)
+    if (Date.now() - info.mtimeMs >= cacheTtlMs) return undefined
+    return JSON.parse(await readFile(path, 'utf-8'))
+  } catch {
+    return undefined
+  }
+}
+
+/**
+ * Delete entries older than the TTL. Every URL (including each pagination cursor)
+ * gets its own file, so without pruning the directory only ever grows.
+ */
+async function pruneCache(): Promise<void> {
+  const now = Date.now()
+  let names: string[]
+  try {
+    names = await readdir(CACHE_DIR)
+  } catch {
+    return
+  }
+  await Promise.all(names.map(async (name) => {
+    const path = join(CACHE_DIR, name)
+    try {
+      if (now - (await stat(path)).mtimeMs >= cacheTtlMs) await unlink(path)
+    } catch {}
+  }))
+}
+
+/** Best-effort write; a cache that can't be written just means the next call refetches. */
+async function writeCache(path: string, body: string): Promise<void> {
+  try {
+    await mkdir(CACHE_DIR, { recursive: true })
+    await writeFile(path, body)
+  } catch {}
+  // At most one sweep per TTL window (long-running processes included)
+  if (Date.now() - lastPruneMs >= cacheTtlMs) {
+    lastPruneMs = Date.now()
+    await pruneCache()
+  }
+}
+
+/** Parse a Retry-After header (delta-seconds or HTTP-date) into milliseconds, capped at 60s. */
+function parseRetryAfter(value: string | null): number | null {
+  if (!value) return null
+  const seconds = Number(value)
+  const ms = Number.isFinite(seconds) ? seconds * 1000 : Date.parse(value) - Date.now()
+  if (!Number.isFinite(ms)) return null
+  return Math.min(Math.max(ms, 0), 60000)
+}
+
 export class TwitterClient {
   private apiKey: string
+  private headers: Record<string, string>
 
   constructor(apiKey?: string) {
     this.apiKey = apiKey || process.env.RAPIDAPI_KEY_241 || ''
@@ -15,6 +87,11 @@ export class TwitterClient {
         'Get a key at https://rapidapi.com/Jeadie/api/twitter241'
       )
     }
+    // Built once and shared by every request (including retries and pagination)
+    this.headers = {
+      'X-RapidAPI-Key': this.apiKey,
+      'X-RapidAPI-Host': RAPIDAPI_HOST,
+    }
   }
 
   private async fetch(endpoint: string, params?: Record<string, string>): Promise<unknown> {
@@ -23,25 +100,34 @@ export class TwitterClient {
       url += '?' + new URLSearchParams(params).toString()
     }
 
+    const cacheFile = cacheTtlMs > 0 ? cachePath(url) : null
+    if (cacheFile) {
+      const cached = await readCache(cacheFile)
+      if (cached !== undefined) return cached
+    }
+
     const maxRetries = 5
     let lastError: Error | null = null
+    let retryAfterMs: number | null = null
 
     for (let attempt = 0; attempt <= maxRetries; attempt++) {
       if (attempt > 0) {
-        const delay = Math.min(1000 * Math.pow(2, attempt - 1), 16000)
+        // Honor the server's Retry-After; otherwise jittered exponential backoff
+        // so concurrent clients don't retry in lockstep
+        const delay = retryAfterMs ?? Math.min(1000 * Math.pow(2, attempt - 1), 16000) * (0.5 + Math.random())
+        retryAfterMs = null
         await new Promise((r) => setTimeout(r, delay))
       }
 
       try {
-        const response = await global.fetch(url, {
-          headers: {
-            'X-RapidAPI-Key': this.apiKey,
-            'X-RapidAPI-Host': RAPIDAPI_HOST,
-          },
-        })
+        const response = await global.fetch(url, { headers: this.headers })
 
+        // Discard unread bodies so the keep-alive connection returns to the pool
+        // Pagination loops don't pace themselves; rate limits are handled here
         if (response.status === 429) {
+          await response.body?.cancel()
           const retryAfter = response.headers.get('retry-after')
+          retryAfterMs = parseRetryAfter(retryAfter)
           lastError = new Error(
             `Rate limited by RapidAPI${retryAfter ? ` — retry after ${retryAfter}s` : ''}. Retrying with backoff...`
           )
@@ -49,6 +135,7 @@ export class TwitterClient {
         }
 
         if (response.status === 403) {
+          await response.body?.cancel()
           throw new Error(
             'API returned 403 Forbidden. This usually means your RAPIDAPI_KEY_241 is invalid or expired. ' +
             'Check your key at https://rapidapi.com/Jeadie/api/twitter241'
@@ -62,7 +149,11 @@ export class TwitterClient {
           throw new Error(`API error: ${response.status} ${response.statusText}${detail}`)
         }
 
-        return await response.json()
+        if (!cacheFile) return await response.json()
+        const body = await response.text()
+        const data = JSON.parse(body)
+        await writeCache(cacheFile, body)
+        return data
       } catch (e) {
         if (e instanceof Error && e.message === 'Rate limited') {
           lastError = e
@@ -260,10 +351,6 @@ export class TwitterClient {
       lastCursor = nextCursor
       if (foundTweets === 0 || !nextCursor) break
       cursor = nextCursor
-
-      if (allTweets.length < count) {
-        await new Promise((r) => setTimeout(r, 1000))
-      }
     }
 
     const items = allTweets.slice(0, count)
@@ -348,10 +435,6 @@ export class TwitterClient {
       lastCursor = nextCursor
       if (foundUsers === 0 || !nextCursor) break
       cursor = nextCursor
-
-      if (users.length < count) {
-        await new Promise((r) => setTimeout(r, 1000))
-      }
     }
 
     const items = users.slice(0, count)
@@ -535,11 +618,6 @@ export class TwitterClient {
       lastCursor = nextCursor
       if (foundTweets === 0 || !nextCursor || hitDateCutoff) break
       cursor = nextCursor
-
-      // Rate limiting between pages
-      if (allTweets.length < limit && !hitDateCutoff) {
-        await new Promise((r) => setTimeout(r, 1000))
-      }
     }
 
     const items = untilDate ? allTweets : allTweets.slice(0, limit)
@@ -615,11 +693,6 @@ export class TwitterClient {
       lastCursor = nextCursor
       if (foundTweets === 0 || !nextCursor) break
       cursor = nextCursor
-
-      // Rate limiting between pages
-      if (allTweets.length < limit) {
-        await new Promise((r) => setTimeout(r, 1000))
-      }
     }
 
     const items = allTweets.slice(0, limit)
@@ -751,11 +824,6 @@ export class TwitterClient {
       lastCursor = nextCursor
       if (foundTweets === 0 || !nextCursor) break
       cursor = nextCursor
-
-      // Rate limiting between pages
-      if (allTweets.length < limit) {
-        await new Promise((r) => setTimeout(r, 1000))
-      }
     }
 
     const items = allTweets.slice(0, limit)
@@ -1,5 +1,6 @@
 import { TwitterClient } from '../client'
 import { buildQuery } from '../query-builder'
+import { formatProfileOutput } from '../formatter'
 import type { OutputFormat } from '../types'
 
 export async function profileCommand(
@@ -26,6 +27,9 @@ export async function profileCommand(
   if (format === 'json') {
     return JSON.stringify({ user, tweets }, null, 2)
   }
+  if (format === 'jsonl') {
+    return formatProfileOutput(user, tweets.items, format)
+  }
 
   // Compact text output
   const lines: string[] = []
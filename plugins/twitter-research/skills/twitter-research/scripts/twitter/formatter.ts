@@ -6,28 +6,48 @@ function formatLikes(count: number): string {
   return count.toString()
 }
 
+/**
+ * Keep the n highest-liked entries without sorting the whole set.
+ * Ties keep first-seen order, matching a stable sort.
+ */
+function topByLikes<T extends { likes: number }>(items: Iterable<T>, n: number): T[] {
+  const top: T[] = []
+  for (const item of items) {
+    if (top.length === n && item.likes <= top[n - 1]!.likes) continue
+    let i = top.length
+    while (i > 0 && top[i - 1]!.likes < item.likes) i--
+    top.splice(i, 0, item)
+    if (top.length > n) top.pop()
+  }
+  return top
+}
+
 function computeSummary(tweets: TwitterTweet[], query: string): SearchSummary {
-  const authors: Record<string, { count: number; likes: number }> = {}
+  const authors = new Map<string, { username: string; count: number; likes: number }>()
+  let totalLikes = 0
+  let totalRetweets = 0
 
+  // Single pass: per-author stats and engagement totals together
   for (const tweet of tweets) {
-    if (!authors[tweet.username]) {
-      authors[tweet.username] = { count: 0, likes: 0 }
+    let stats = authors.get(tweet.username)
+    if (!stats) {
+      stats = { username: tweet.username, count: 0, likes: 0 }
+      authors.set(tweet.username, stats)
     }
-    authors[tweet.username].count++
-    authors[tweet.username].likes += tweet.likeCount
+    stats.count++
+    stats.likes += tweet.likeCount
+    totalLikes += tweet.likeCount
+    totalRetweets += tweet.retweetCount
   }
 
-  const topAuthors = Object.entries(authors)
-    .map(([username, stats]) => ({ username, ...stats }))
-    .sort((a, b) => b.likes - a.likes)
-    .slice(0, 5)
+  const topAuthors = topByLikes(authors.values(), 5)
 
   return {
     query,
     total: tweets.length,
-    uniqueAuthors: Object.keys(authors).length,
-    totalLikes: tweets.reduce((sum, t) => sum + t.likeCount, 0),
-    totalRetweets: tweets.reduce((sum, t) => sum + t.retweetCount, 0),
+    uniqueAuthors: authors.size,
+    totalLikes,
+    totalRetweets,
     topAuthors,
   }
 }
@@ -108,14 +128,15 @@ export function formatTweetsText(tweets: TwitterTweet[], query: string): string
   lines.push('## Tweets')
   lines.push('')
 
-  // Tweets with expanded links
+  // Tweets with expanded links (one template per tweet; trailing \n leaves a blank line after the join)
   for (const tweet of tweets) {
     const text = expandedTexts.get(tweet.id) || tweet.text
     const followerTag = tweet.authorFollowersCount != null ? ` (${formatLikes(tweet.authorFollowersCount)} followers)` : ''
-    lines.push(`@${tweet.username}${followerTag} · ${formatLikes(tweet.likeCount)} likes`)
-    lines.push(truncateText(text))
-    lines.push(`→ twitter.com/${tweet.username}/status/${tweet.id}`)
-    lines.push('')
+    lines.push(
+      `@${tweet.username}${followerTag} · ${formatLikes(tweet.likeCount)} likes\n` +
+      `${truncateText(text)}\n` +
+      `→ twitter.com/${tweet.username}/status/${tweet.id}\n`
+    )
   }
 
   // Deduplicated link index
@@ -150,6 +171,11 @@ export function formatUserJson(user: TwitterUser): string {
   return JSON.stringify(user, null, 2)
 }
 
+/** One compact JSON record per line; no wrapper object, so consumers can stream it. */
+function formatJsonl(items: unknown[]): string {
+  return items.map((item) => JSON.stringify(item)).join('\n')
+}
+
 export function formatUsersText(users: TwitterUser[]): string {
   if (users.length === 0) {
     return 'No users found.'
@@ -188,6 +214,7 @@ export function formatCommunitiesOutput(
   communities: TwitterCommunity[],
   format: OutputFormat
 ): string {
+  if (format === 'jsonl') return formatJsonl(communities)
   return format === 'json' ? JSON.stringify(communities, null, 2) : formatCommunitiesText(communities)
 }
 
@@ -196,6 +223,10 @@ export function formatOutput(
   format: OutputFormat,
   query?: string
 ): string {
+  if (format === 'jsonl') {
+    return Array.isArray(data) ? formatJsonl(data) : formatJsonl([data])
+  }
+
   if (Array.isArray(data)) {
     if (data.length === 0) {
       return format === 'json' ? '{"summary":null,"tweets":[]}' : 'No results found.'
@@ -230,6 +261,10 @@ export function formatProfileOutput(
   if (format === 'json') {
     return JSON.stringify({ user, tweets }, null, 2)
   }
+  if (format === 'jsonl') {
+    // User record first, then one tweet per line
+    return formatJsonl([user, ...tweets])
+  }
 
   const lines: string[] = []
 
@@ -254,9 +289,10 @@ export function formatProfileOutput(
   // Tweets
   for (const tweet of tweets) {
     const text = expandedTexts.get(tweet.id) || tweet.text
-    lines.push(`${formatLikes(tweet.likeCount)} likes · ${truncateText(text, 200)}`)
-    lines.push(`→ twitter.com/${tweet.username}/status/${tweet.id}`)
-    lines.push('')
+    lines.push(
+      `${formatLikes(tweet.likeCount)} likes · ${truncateText(text, 200)}\n` +
+      `→ twitter.com/${tweet.username}/status/${tweet.id}\n`
+    )
   }
 
   const linkSection = formatLinkIndex(linkIndex)
@@ -3,6 +3,7 @@ import { userCommand } from './commands/user'
 import { findCommand } from './commands/find'
 import { profileCommand } from './commands/profile'
 import { repliesCommand } from './commands/replies'
+import { setCacheTtl, DEFAULT_CACHE_TTL } from './client'
 import {
   searchArgsSchema,
   userArgsSchema,
@@ -56,7 +57,11 @@ Search Options:
   --lang CODE         Language code
   --limit N           Max results (default: 20)
   --preset NAME       Use preset (indie, viral, recent)
-  --format FORMAT     Output format (text, json)
+  --format FORMAT     Output format (text, json, jsonl)
+
+Cache Options (all commands):
+  --cache-ttl N       Reuse API responses younger than N seconds (default: ${DEFAULT_CACHE_TTL})
+  --no-cache          Always fetch fresh results
 
 Examples:
   bun run cli research tw search "indie hacker" 50 --min-likes 100
@@ -96,6 +101,7 @@ function parseArgs(argv: string[]): {
         'has-images',
         'has-videos',
         'has-links',
+        'no-cache',
         'help',
       ]
 
@@ -153,6 +159,16 @@ export async function main(argv = process.argv.slice(2)) {
   }
 
   try {
+    if (raw['no-cache']) {
+      setCacheTtl(0)
+    } else if (raw['cache-ttl']) {
+      const ttl = Number(raw['cache-ttl'])
+      if (!Number.isFinite(ttl) || ttl < 0) {
+        throw new Error(`Invalid arguments:\n  --cache-ttl: expected a non-negative number of seconds`)
+      }
+      setCacheTtl(ttl)
+    }
+
     switch (command) {
       case 'search': {
         const result = searchArgsSchema.safeParse({ ...raw, keywords: positional })
@@ -1,5 +1,50 @@
 import type { SearchOptions } from './types'
 
+type StringFilter = 'from' | 'to' | 'mention' | 'since' | 'until' | 'url' | 'lang'
+type NumberFilter = 'minLikes' | 'minRetweets' | 'minReplies'
+type FlagFilter = 'noRetweets' | 'noReplies' | 'onlyReplies' | 'hasMedia' | 'hasImages' | 'hasVideos' | 'hasLinks'
+
+// Operator tables, each applied in order (query part order matches the tables)
+const USER_FILTERS: ReadonlyArray<[StringFilter, string]> = [
+  ['from', 'from:'],
+  ['to', 'to:'],
+  ['mention', '@'],
+]
+
+const ENGAGEMENT_FILTERS: ReadonlyArray<[NumberFilter, string]> = [
+  ['minLikes', 'min_faves:'],
+  ['minRetweets', 'min_retweets:'],
+  ['minReplies', 'min_replies:'],
+]
+
+const DATE_FILTERS: ReadonlyArray<[StringFilter, string]> = [
+  ['since', 'since:'],
+  ['until', 'until:'],
+]
+
+// Type filters, then media filters
+const FLAG_FILTERS: ReadonlyArray<[FlagFilter, string]> = [
+  ['noRetweets', '-filter:retweets'],
+  ['noReplies', '-filter:replies'],
+  ['onlyReplies', 'filter:replies'],
+  ['hasMedia', 'filter:media'],
+  ['hasImages', 'filter:images'],
+  ['hasVideos', 'filter:videos'],
+  ['hasLinks', 'filter:links'],
+]
+
+const TRAILING_FILTERS: ReadonlyArray<[StringFilter, string]> = [
+  ['url', 'url:'],
+  ['lang', 'lang:'],
+]
+
+function pushPrefixed(parts: string[], options: SearchOptions, table: ReadonlyArray<[StringFilter, string]>): void {
+  for (const [key, prefix] of table) {
+    const value = options[key]
+    if (value) parts.push(prefix + value)
+  }
+}
+
 export function buildQuery(options: SearchOptions): string {
   const parts: string[] = []
 
@@ -16,10 +61,7 @@ export function buildQuery(options: SearchOptions): string {
     }
   }
 
-  // User filters
-  if (options.from) parts.push(`from:${options.from}`)
-  if (options.to) parts.push(`to:${options.to}`)
-  if (options.mention) parts.push(`@${options.mention}`)
+  pushPrefixed(parts, options, USER_FILTERS)
 
   // Hashtags
   if (options.hashtags?.length) {
@@ -35,40 +77,23 @@ export function buildQuery(options: SearchOptions): string {
     }
   }
 
-  // Engagement filters
-  if (options.minLikes && options.minLikes > 0) {
-    parts.push(`min_faves:${options.minLikes}`)
-  }
-  if (options.minRetweets && options.minRetweets > 0) {
-    parts.push(`min_retweets:${options.minRetweets}`)
-  }
-  if (options.minReplies && options.minReplies > 0) {
-    parts.push(`min_replies:${options.minReplies}`)
+  for (const [key, prefix] of ENGAGEMENT_FILTERS) {
+    const value = options[key]
+    if (value && value > 0) parts.push(prefix + value)
   }
 
-  // Date filters
-  if (options.since) parts.push(`since:${options.since}`)
-  if (options.until) parts.push(`until:${options.until}`)
+  pushPrefixed(parts, options, DATE_FILTERS)
   if (options.days && options.days > 0) {
     const since = new Date()
     since.setDate(since.getDate() - options.days)
-    parts.push(`since:${since.toISOString().split('T')[0]}`)
+    parts.push(`since:${since.toISOString().slice(0, 10)}`)
   }
 
-  // Type filters
-  if (options.noRetweets) parts.push('-filter:retweets')
-  if (options.noReplies) parts.push('-filter:replies')
-  if (options.onlyReplies) parts.push('filter:replies')
-
-  // Media filters
-  if (options.hasMedia) parts.push('filter:media')
-  if (options.hasImages) parts.push('filter:images')
-  if (options.hasVideos) parts.push('filter:videos')
-  if (options.hasLinks) parts.push('filter:links')
-  if (options.url) parts.push(`url:${options.url}`)
+  for (const [key, operator] of FLAG_FILTERS) {
+    if (options[key]) parts.push(operator)
+  }
 
-  // Language
-  if (options.lang) parts.push(`lang:${options.lang}`)
+  pushPrefixed(parts, options, TRAILING_FILTERS)
 
   return parts.join(' ')
 }
@@ -58,19 +58,18 @@ function isSafeUnquoted(value: string): boolean {
   return true
 }
 
+const ESCAPES: Record<string, string> = {
+  '"': '\\"',
+  '\\': '\\\\',
+  '\n': '\\n',
+  '\r': '\\r',
+  '\t': '\\t',
+}
+const ESCAPE_RE = /["\\\n\r\t]/g
+
+/** Escape in one native pass; unlike per-character concatenation, clean runs are copied as-is. */
 function escapeString(value: string): string {
-  let result = ''
-  for (const ch of value) {
-    switch (ch) {
-      case '"': result += '\\"'; break
-      case '\\': result += '\\\\'; break
-      case '\n': result += '\\n'; break
-      case '\r': result += '\\r'; break
-      case '\t': result += '\\t'; break
-      default: result += ch
-    }
-  }
-  return result
+  return value.replace(ESCAPE_RE, (ch) => ESCAPES[ch]!)
 }
 
 function isPrimitive(value: unknown): value is Primitive {
@@ -114,14 +114,14 @@ export const searchArgsSchema = z.object({
   lang: z.string().optional(),
   limit: optionalInt,
   preset: z.string().optional(),
-  format: z.enum(['text', 'json']).optional().default('text'),
+  format: z.enum(['text', 'json', 'jsonl']).optional().default('text'),
 })
 
 export type SearchArgs = z.infer<typeof searchArgsSchema>
 
 export const userArgsSchema = z.object({
   username: z.string({ required_error: 'Username required' }),
-  format: z.enum(['text', 'json']).optional().default('text'),
+  format: z.enum(['text', 'json', 'jsonl']).optional().default('text'),
 })
 
 export type UserArgs = z.infer<typeof userArgsSchema>
@@ -135,14 +135,14 @@ export const tweetsArgsSchema = z.object({
   until: z.string().optional(),
   days: optionalInt,
   limit: optionalInt,
-  format: z.enum(['text', 'json']).optional().default('text'),
+  format: z.enum(['text', 'json', 'jsonl']).optional().default('text'),
 })
 
 export type TweetsArgs = z.infer<typeof tweetsArgsSchema>
 
 export const findArgsSchema = z.object({
   name: z.string({ required_error: 'Name/keyword required' }),
-  format: z.enum(['text', 'json']).optional().default('text'),
+  format: z.enum(['text', 'json', 'jsonl']).optional().default('text'),
 })
 
 export type FindArgs = z.infer<typeof findArgsSchema>
@@ -150,7 +150,7 @@ export type FindArgs = z.infer<typeof findArgsSchema>
 export const profileArgsSchema = z.object({
   username: z.string({ required_error: 'Username required' }),
   limit: optionalInt,
-  format: z.enum(['text', 'json']).optional().default('text'),
+  format: z.enum(['text', 'json', 'jsonl']).optional().default('text'),
 })
 
 export type ProfileArgs = z.infer<typeof profileArgsSchema>
@@ -159,7 +159,7 @@ export const repliesArgsSchema = z.object({
   tweetId: z.string({ required_error: 'Tweet ID required' }),
   limit: optionalInt,
   rankingMode: z.enum(['Recency', 'Relevance', 'Likes']).optional().default('Relevance'),
-  format: z.enum(['text', 'json']).optional().default('text'),
+  format: z.enum(['text', 'json', 'jsonl']).optional().default('text'),
 })
 
 export type RepliesArgs = z.infer<typeof repliesArgsSchema>
@@ -193,7 +193,7 @@ export interface SearchOptions {
   preset?: string
 }
 
-export type OutputFormat = 'text' | 'json'
+export type OutputFormat = 'text' | 'json' | 'jsonl'
 
 // Convert CLI args to internal options
 